@@ -5,18 +5,72 @@ Coze模块认证中间件
 """
 
 import os
-import requests
+import hashlib
+import threading
+import httpx
 from typing import Optional
-from fastapi import HTTPException, Request
+from cachetools import TTLCache
+from starlette.routing import Match
 
-from .config import get_coze_config
+from .config import CozeConfig, get_coze_config
 from .logging_config import get_coze_logger
+from .error_handlers import create_error_response
+from .utils import safe_json_dumps
+from .http_clients import get_auth_http_client
 
 logger = get_coze_logger()
-config = get_coze_config()
 
+# JWT验证结果缓存（只保存token哈希，不保存原始token；只缓存验证通过的结果）
+# 首次使用时按配置创建，避免导入模块时读取配置
+_verify_cache: Optional[TTLCache] = None
+_verify_cache_lock = threading.Lock()
 
-def verify_jwt_token(http_scheme: str, request_host: str, root_token: str) -> bool:
+# 无需认证的路径（根路径、健康检查和API文档）
+PUBLIC_PATHS = frozenset({
+    "/", "/health", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"
+})
+
+# token/host中不允许的控制字符：token格式由验证服务负责校验，host按子串匹配配置的主机（可带协议、路径或下划线），
+# 因此本地只拒绝不可打印字符；配合 bytes.translate(None, ...) 在C层一次性删除，长度变化即含控制字符
+_CONTROL_CHARS = bytes(range(0x20)) + b"\x7f"
+
+
+def _get_verify_cache() -> TTLCache:
+    """
+    获取JWT验证结果缓存（首次调用时创建）
+    
+    Returns:
+        TTLCache: JWT验证结果缓存
+    """
+    global _verify_cache
+    if _verify_cache is None:
+        with _verify_cache_lock:
+            if _verify_cache is None:
+                config = get_coze_config()
+                _verify_cache = TTLCache(maxsize=config.auth_cache_size, ttl=config.auth_cache_ttl)
+    return _verify_cache
+
+
+def _verify_cache_key(request_host: str, root_token: str) -> str:
+    """
+    生成JWT验证缓存键
+    
+    Args:
+        request_host: 请求主机
+        root_token: JWT token
+    
+    Returns:
+        str: 由token哈希和主机组成的缓存键
+    """
+    return hashlib.sha256(root_token.encode()).hexdigest()[:32] + "|" + request_host
+
+
+async def verify_jwt_token(
+    http_scheme: str,
+    request_host: str,
+    root_token: str,
+    request_url: Optional[str] = None
+) -> bool:
     """
     验证JWT token
     
@@ -24,22 +78,33 @@ def verify_jwt_token(http_scheme: str, request_host: str, root_token: str) -> bo
         http_scheme: HTTP协议方案（http:// 或 https://）
         request_host: 请求主机
         root_token: JWT token
+        request_url: 预先拼接好的验证URL，未提供时根据协议和主机拼接
     
     Returns:
         bool: 验证是否通过
     
     Raises:
-        requests.exceptions.HTTPError: HTTP错误
+        httpx.HTTPStatusError: HTTP错误
         Exception: 其他错误
     """
-    logger.info(f"Verify jwt token: scheme[{http_scheme}]")
-    logger.info(f"Verify jwt token: host[{request_host}]")
-    logger.info(f"Verify jwt token: token[{root_token[:20]}...]")
+    # 认证热路径日志统一使用debug级别，默认INFO级别下不产生格式化开销
+    logger.debug("Verify jwt token: scheme[{}]", http_scheme)
+    logger.debug("Verify jwt token: host[{}]", request_host)
+    logger.opt(lazy=True).debug("Verify jwt token: token[{}...]", lambda: root_token[:20])
+    
+    verify_cache = _get_verify_cache()
+    cache_key = _verify_cache_key(request_host, root_token)
+    with _verify_cache_lock:
+        cached = verify_cache.get(cache_key)
+    if cached is not None:
+        logger.debug('Verify jwt token hit cache')
+        return cached
     
-    request_url = http_scheme + request_host + "/api/v1/uc/verify_jwt_token"
+    if request_url is None:
+        request_url = http_scheme + request_host + "/api/v1/uc/verify_jwt_token"
     
     try:
-        response = requests.post(
+        response = await get_auth_http_client().post(
             request_url,
             headers={
                 'Authorization': root_token,
@@ -50,11 +115,18 @@ def verify_jwt_token(http_scheme: str, request_host: str, root_token: str) -> bo
         # 如果响应不成功，抛出异常
         response.raise_for_status()
         
-        logger.info('Verify jwt token success')
+        logger.debug('Verify jwt token success')
         json_string = response.json()
-        return json_string.get('r', False)
+        verified = json_string.get('r', False)
         
-    except requests.exceptions.HTTPError as http_err:
+        # 只缓存验证通过的结果，避免瞬时错误导致持续拒绝
+        if verified:
+            with _verify_cache_lock:
+                verify_cache[cache_key] = verified
+        
+        return verified
+        
+    except httpx.HTTPStatusError as http_err:
         logger.error(f'Verify jwt token fail with http error occurred: [{http_err}]')
         raise http_err
     except Exception as err:
@@ -62,96 +134,175 @@ def verify_jwt_token(http_scheme: str, request_host: str, root_token: str) -> bo
         raise err
 
 
-async def verify_request_header_host_token(request: Request) -> bool:
+async def verify_host_token(
+    config: CozeConfig,
+    hty_sudoer_token: Optional[str],
+    hty_host: Optional[bytes]
+) -> Optional[str]:
     """
-    FastAPI依赖函数：验证请求头中的token和host
+    验证请求头中的token和host
     
     Args:
-        request: FastAPI请求对象
+        config: Coze配置
+        hty_sudoer_token: 请求头 HtySudoerToken 的值
+        hty_host: 请求头 HtyHost 的原始bytes值
     
     Returns:
-        bool: 验证是否通过
-    
-    Raises:
-        HTTPException: 验证失败时抛出
+        Optional[str]: 验证失败的原因，验证通过时返回None
     """
-    # 检查是否启用身份验证
-    if not config.enable_auth:
-        logger.info("Authentication disabled, skipping verification")
-        return True
-    
-    # 从请求头获取token和host
-    hty_sudoer_token = request.headers.get("HtySudoerToken")
-    hty_host = request.headers.get("HtyHost")
-    
-    logger.info(f"HtySudoerToken :  [{hty_sudoer_token[:20] if hty_sudoer_token else None}...]")
-    logger.info(f"HtyHost :  [{hty_host}]")
+    logger.opt(lazy=True).debug(
+        "HtySudoerToken :  [{}...]", lambda: hty_sudoer_token[:20] if hty_sudoer_token else None
+    )
+    logger.opt(lazy=True).debug(
+        "HtyHost :  [{}]", lambda: hty_host.decode("latin-1") if hty_host else None
+    )
     
     if not hty_sudoer_token:
         logger.error("HtySudoerToken not found in header.")
-        raise HTTPException(
-            status_code=401,
-            detail="HtySudoerToken not found in header"
-        )
+        return "HtySudoerToken not found in header"
     
     if not hty_host:
         logger.error("HtyHost not found in header.")
-        raise HTTPException(
-            status_code=401,
-            detail="HtyHost not found in header"
-        )
+        return "HtyHost not found in header"
+    
+    # 含控制字符的token/host无需查缓存或请求验证服务，直接拒绝
+    token_bytes = hty_sudoer_token.encode("latin-1")
+    if len(token_bytes.translate(None, _CONTROL_CHARS)) != len(token_bytes):
+        logger.error("HtySudoerToken contains invalid characters.")
+        return "HtySudoerToken invalid"
     
-    logger.info(f"Request header host :  [{hty_host}]")
+    if len(hty_host.translate(None, _CONTROL_CHARS)) != len(hty_host):
+        logger.error(f"Request header host :  [{hty_host.decode('latin-1')}] invalid.")
+        return "Request header host invalid"
     
-    # 检查请求host
+    # 检查请求host（按配置顺序匹配预先计算的host表）
     validated_host = None
-    if config.alchemy_host in hty_host:
-        logger.info(f"Request header host :  [{hty_host}] valid (alchemy).")
-        validated_host = "admin." + config.alchemy_host
-    elif config.moicen_host in hty_host:
-        logger.info(f"Request header host :  [{hty_host}] valid (moicen).")
-        validated_host = "admin." + config.moicen_host
-    elif config.huiwings_host in hty_host:
-        logger.info(f"Request header host :  [{hty_host}] valid (huiwings).")
-        validated_host = "admin." + config.huiwings_host
-    elif config.local_host in hty_host:
-        logger.info(f"Request header host :  [{hty_host}] valid (local).")
-        validated_host = "admin." + config.local_host
-    else:
-        logger.error(f"Request header host :  [{hty_host}] invalid.")
-        raise HTTPException(
-            status_code=401,
-            detail="Request header host invalid"
-        )
+    for needle, admin_host in config._host_map:
+        if needle in hty_host:
+            validated_host = admin_host
+            break
+    
+    if validated_host is None:
+        logger.error(f"Request header host :  [{hty_host.decode('latin-1')}] invalid.")
+        return "Request header host invalid"
+    
+    logger.opt(lazy=True).debug(
+        "Request header host :  [{}] valid ({}).", lambda: hty_host.decode("latin-1"), lambda: validated_host
+    )
     
     # 验证JWT token
     try:
-        verify_response = verify_jwt_token(
+        verify_response = await verify_jwt_token(
             config.http_scheme,
             validated_host,
-            hty_sudoer_token
+            hty_sudoer_token,
+            config.verify_urls[validated_host]
         )
-        logger.info(f"Verify response token result is : [{verify_response}]")
+        logger.debug("Verify response token result is : [{}]", verify_response)
         
         if not verify_response:
             logger.error("JWT token verification failed")
-            raise HTTPException(
-                status_code=401,
-                detail="JWT token verification failed"
-            )
+            return "JWT token verification failed"
         
-        return True
+        return None
         
-    except requests.exceptions.HTTPError as http_err:
+    except httpx.HTTPStatusError as http_err:
         logger.error(f"JWT token verification HTTP error: {http_err}")
-        raise HTTPException(
-            status_code=401,
-            detail=f"JWT token verification failed: {str(http_err)}"
-        )
+        return f"JWT token verification failed: {str(http_err)}"
     except Exception as err:
         logger.error(f"JWT token verification error: {err}")
-        raise HTTPException(
-            status_code=401,
-            detail=f"JWT token verification failed: {str(err)}"
-        )
+        return f"JWT token verification failed: {str(err)}"
+
+
+class AuthASGIMiddleware:
+    """
+    纯ASGI认证中间件
+    直接从ASGI scope读取 HtySudoerToken 和 HtyHost 请求头，验证失败时直接返回401
+    """
+    
+    def __init__(self, app, config: Optional[CozeConfig] = None):
+        """
+        初始化中间件
+        
+        Starlette在应用首次收到ASGI事件（lifespan启动或首个请求）时才构建中间件栈，
+        未传入配置时在此读取，避免导入 app.main 时读取配置
+        
+        Args:
+            app: 下游ASGI应用
+            config: Coze配置，未提供时使用 get_coze_config()
+        """
+        self.app = app
+        self.config = config if config is not None else get_coze_config()
+        # 未启用认证时直接透传，请求不经过任何认证逻辑
+        self.enabled = self.config.enable_auth
+    
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] in PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        # 单次遍历原始请求头（ASGI规范保证header名为小写bytes）
+        # 与 request.headers.get 一致取首次出现的值，两个请求头都找到后立即结束遍历
+        hty_sudoer_token = None
+        hty_host = None
+        for name, value in scope["headers"]:
+            if name == b"htysudoertoken":
+                if hty_sudoer_token is None:
+                    hty_sudoer_token = value.decode("latin-1")
+            elif name == b"htyhost":
+                if hty_host is None:
+                    hty_host = value
+            else:
+                continue
+            if hty_sudoer_token is not None and hty_host is not None:
+                break
+        
+        error_message = await verify_host_token(self.config, hty_sudoer_token, hty_host)
+        if error_message is not None and _matches_route(scope):
+            await _send_unauthorized(send, error_message)
+            return
+        
+        # 认证通过，或请求未匹配任何路由（交由路由返回404/405，与按路由认证时的行为一致）
+        
+        await self.app(scope, receive, send)
+
 
+def _matches_route(scope) -> bool:
+    """
+    判断请求是否完整匹配某个路由（路径和方法均匹配）
+    
+    只在认证失败时调用，正常请求不产生路由匹配开销
+    
+    Args:
+        scope: ASGI scope（scope["app"] 为 FastAPI 应用）
+        
+    Returns:
+        bool: 是否匹配
+    """
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return True
+    return False
+
+
+async def _send_unauthorized(send, error_message: str) -> None:
+    """
+    直接通过ASGI send发送401响应（与HTTP异常处理器的响应格式一致）
+    
+    Args:
+        send: ASGI send函数
+        error_message: 错误消息
+    """
+    body = safe_json_dumps(
+        create_error_response(error_message, 401, error_code="HTTP_401")
+    ).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -4,16 +4,34 @@ Coze模块配置管理
 """
 
 import os
-from typing import Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
-# 加载 .env 文件（支持从项目根目录或当前目录加载）
-# 优先从项目根目录加载（app 目录的上一级）
+# 加载项目根目录（app 目录的上一级）下的 .env 文件
+# 环境变量已由容器/编排系统注入或 .env 文件不存在时跳过，避免无谓的文件读取
 env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-load_dotenv(dotenv_path=env_path, override=False)
-# 也尝试从当前目录加载（容器内可能的工作目录）
-load_dotenv(override=False)
+if os.getenv("COZE_API_TOKEN") is None and os.path.isfile(env_path):
+    load_dotenv(dotenv_path=env_path, override=False)
+
+
+# 视为真值的布尔环境变量取值
+_TRUE = frozenset({"true", "1", "yes", "on"})
+
+
+def _parse_bool(value: str) -> bool:
+    """
+    解析布尔类型的环境变量
+    
+    Args:
+        value: 环境变量值
+    
+    Returns:
+        bool: 解析结果
+    """
+    return value.lower() in _TRUE
 
 
 @dataclass
@@ -34,12 +52,21 @@ class CozeConfig:
     timeout: int = 30  # API请求超时时间，单位：秒
     max_retries: int = 3  # API请求失败时的最大重试次数，单位：次
     poll_interval: float = 1.0  # 轮询间隔时间，单位：秒
+    http_max_connections: int = 100  # Coze API HTTP连接池最大连接数
+    http_max_keepalive_connections: int = 30  # Coze API HTTP连接池最大空闲keep-alive连接数
+    http_keepalive_expiry: float = 75.0  # 空闲keep-alive连接保留时间（秒）
     
     # Redis配置
     redis_url: str = "redis://localhost:6380/0"
     redis_prefix: str = "coze:"
     session_expire: int = 3600  # 会话过期时间（秒）
     result_expire: int = 1800   # 结果过期时间（秒）
+    redis_max_connections: int = 50  # Redis连接池最大连接数（连接耗尽时等待空闲连接）
+    redis_socket_connect_timeout: float = 1.0  # Redis建立连接超时时间（秒），连接不上时快速失败
+    redis_health_check_interval: int = 30  # 空闲连接复用前的健康检查间隔（秒）
+    stats_cache_ttl: int = 10  # Redis使用统计结果缓存时间（秒），0表示不缓存
+    read_cache_ttl: float = 0.0  # 会话/聊天结果进程内读缓存时间（秒），默认0表示不缓存
+    read_cache_size: int = 10000  # 进程内读缓存的最大条目数
     
     # 数据保留策略配置
     max_active_users: int = 1000  # 最大保留活跃用户数（超过此数量时清理最久未活动的用户）
@@ -53,10 +80,13 @@ class CozeConfig:
     
     # 业务配置
     max_message_length: int = 4000  # 单条消息的最大长度限制，单位：字符
+    stream_chats_threshold: int = 200  # 会话聊天记录数超过此值时以流式响应返回，单位：条
     
     # 认证配置
     enable_auth: bool = True  # 是否启用认证
     http_scheme: str = "https://"  # HTTP协议方案
+    auth_cache_ttl: int = 30  # JWT验证结果缓存时间（秒）
+    auth_cache_size: int = 10000  # JWT验证结果缓存的最大条目数
     
     # Host配置（用于认证）
     alchemy_host: str = "alchemy-studio.cn"
@@ -64,31 +94,70 @@ class CozeConfig:
     huiwings_host: str = "huiwings.cn"
     local_host: str = "localhost"
     
+    # 环境变量映射表：(属性名, 环境变量名, 类型转换函数)
+    # 未设置的环境变量保留字段默认值
+    _ENV_SPEC = (
+        ("api_url", "COZE_API_URL", str),
+        ("base_url", "COZE_BASE_URL", str),
+        ("timeout", "COZE_TIMEOUT", int),
+        ("max_retries", "COZE_MAX_RETRIES", int),
+        ("poll_interval", "COZE_POLL_INTERVAL", float),
+        ("http_max_connections", "COZE_HTTP_MAX_CONNECTIONS", int),
+        ("http_max_keepalive_connections", "COZE_HTTP_MAX_KEEPALIVE_CONNECTIONS", int),
+        ("http_keepalive_expiry", "COZE_HTTP_KEEPALIVE_EXPIRY", float),
+        # Redis配置
+        ("redis_url", "REDIS_URL", str),
+        ("redis_prefix", "COZE_REDIS_PREFIX", str),
+        ("session_expire", "COZE_SESSION_EXPIRE", int),
+        ("result_expire", "COZE_RESULT_EXPIRE", int),
+        ("redis_max_connections", "COZE_REDIS_MAX_CONNECTIONS", int),
+        ("redis_socket_connect_timeout", "COZE_REDIS_SOCKET_CONNECT_TIMEOUT", float),
+        ("redis_health_check_interval", "COZE_REDIS_HEALTH_CHECK_INTERVAL", int),
+        ("stats_cache_ttl", "COZE_STATS_CACHE_TTL", int),
+        ("read_cache_ttl", "COZE_READ_CACHE_TTL", float),
+        ("read_cache_size", "COZE_READ_CACHE_SIZE", int),
+        # 日志配置
+        ("log_level", "COZE_LOG_LEVEL", str),
+        ("log_format", "COZE_LOG_FORMAT", str),
+        # 业务配置
+        ("max_message_length", "COZE_MAX_MESSAGE_LENGTH", int),
+        ("stream_chats_threshold", "COZE_STREAM_CHATS_THRESHOLD", int),
+        ("max_sessions_per_user", "COZE_MAX_SESSIONS_PER_USER", int),
+        # 数据保留策略配置
+        ("max_active_users", "COZE_MAX_ACTIVE_USERS", int),
+        ("max_total_sessions", "COZE_MAX_TOTAL_SESSIONS", int),
+        ("user_inactive_timeout", "COZE_USER_INACTIVE_TIMEOUT", int),
+        # 认证配置
+        ("enable_auth", "ENABLE_AUTH", _parse_bool),
+        ("http_scheme", "HTTP_SCHEME", str),
+        ("auth_cache_ttl", "COZE_AUTH_CACHE_TTL", int),
+        ("auth_cache_size", "COZE_AUTH_CACHE_SIZE", int),
+        # Host配置
+        ("alchemy_host", "ALCHEMY_HOST", str),
+        ("moicen_host", "MOICEN_HOST", str),
+        ("huiwings_host", "HUIWINGS_HOST", str),
+        ("local_host", "LOCAL_HOST", str),
+    )
+    
     def __post_init__(self):
         """初始化后处理，从环境变量读取配置"""
-        # 根据运行模式设置不同的URL
-        mode = os.getenv("APP_MODE", "remote")
-        if mode == "local":
+        env = os.environ
+        
+        # 根据运行模式设置不同的URL默认值
+        if env.get("APP_MODE", "remote") == "local":
             # 本地测试模式，使用本地URL
-            default_api_url = "http://localhost:5000/coze/v3/chat"
-            default_base_url = "http://localhost:5000/coze/v3"
-        else:
-            # 远程部署模式，使用线上URL
-            default_api_url = self.api_url
-            default_base_url = self.base_url
-            
-        self.api_url = os.getenv("COZE_API_URL", default_api_url)
-        self.base_url = os.getenv("COZE_BASE_URL", default_base_url)
+            self.api_url = "http://localhost:5000/coze/v3/chat"
+            self.base_url = "http://localhost:5000/coze/v3"
         
         # 从环境变量读取 token 和 bot_id，不再使用硬编码默认值
-        coze_api_token = os.getenv("COZE_API_TOKEN")
+        coze_api_token = env.get("COZE_API_TOKEN")
         if not coze_api_token:
             raise ValueError(
                 "COZE_API_TOKEN environment variable is required. "
                 "Please set it in .env file or environment variables."
             )
         
-        coze_bot_id = os.getenv("COZE_BOT_ID")
+        coze_bot_id = env.get("COZE_BOT_ID")
         if not coze_bot_id:
             raise ValueError(
                 "COZE_BOT_ID environment variable is required. "
@@ -97,7 +166,7 @@ class CozeConfig:
         
         # 构建 authorization header
         # 如果 COZE_AUTHORIZATION 已设置，直接使用；否则使用 COZE_API_TOKEN 构建
-        coze_authorization = os.getenv("COZE_AUTHORIZATION")
+        coze_authorization = env.get("COZE_AUTHORIZATION")
         if coze_authorization:
             # 如果已经包含 Bearer 前缀，直接使用；否则添加 Bearer 前缀
             if not coze_authorization.startswith("Bearer "):
@@ -109,36 +178,25 @@ class CozeConfig:
             self.authorization = f"Bearer {coze_api_token}"
         self.bot_id = coze_bot_id
         
-        self.timeout = int(os.getenv("COZE_TIMEOUT", str(self.timeout)))
-        self.max_retries = int(os.getenv("COZE_MAX_RETRIES", str(self.max_retries)))
-        self.poll_interval = float(os.getenv("COZE_POLL_INTERVAL", str(self.poll_interval)))
-        
-        # Redis配置
-        self.redis_url = os.getenv("REDIS_URL", self.redis_url)
-        self.redis_prefix = os.getenv("COZE_REDIS_PREFIX", self.redis_prefix)
-        self.session_expire = int(os.getenv("COZE_SESSION_EXPIRE", str(self.session_expire)))
-        self.result_expire = int(os.getenv("COZE_RESULT_EXPIRE", str(self.result_expire)))
-        
-        self.log_level = os.getenv("COZE_LOG_LEVEL", self.log_level)
-        self.log_format = os.getenv("COZE_LOG_FORMAT", self.log_format)
-        
-        self.max_message_length = int(os.getenv("COZE_MAX_MESSAGE_LENGTH", str(self.max_message_length)))
-        self.max_sessions_per_user = int(os.getenv("COZE_MAX_SESSIONS_PER_USER", str(self.max_sessions_per_user)))
-        
-        # 数据保留策略配置
-        self.max_active_users = int(os.getenv("COZE_MAX_ACTIVE_USERS", str(self.max_active_users)))
-        self.max_total_sessions = int(os.getenv("COZE_MAX_TOTAL_SESSIONS", str(self.max_total_sessions)))
-        self.user_inactive_timeout = int(os.getenv("COZE_USER_INACTIVE_TIMEOUT", str(self.user_inactive_timeout)))
+        # 按映射表读取其余配置
+        for attr, key, caster in self._ENV_SPEC:
+            value = env.get(key)
+            if value is not None:
+                setattr(self, attr, caster(value))
         
-        # 认证配置
-        self.enable_auth = os.getenv("ENABLE_AUTH", str(self.enable_auth)).lower() in ("true", "1", "yes")
-        self.http_scheme = os.getenv("HTTP_SCHEME", self.http_scheme)
+        # 预先计算认证用的host匹配表：(请求host中需包含的bytes, 验证使用的admin host)
+        self._host_map = tuple(
+            (host.encode("latin-1"), "admin." + host)
+            for host in (self.alchemy_host, self.moicen_host, self.huiwings_host, self.local_host)
+        )
+        # 预先拼接各admin host对应的JWT验证URL
+        self.verify_urls = {
+            admin_host: f"{self.http_scheme}{admin_host}/api/v1/uc/verify_jwt_token"
+            for _, admin_host in self._host_map
+        }
         
-        # Host配置
-        self.alchemy_host = os.getenv("ALCHEMY_HOST", self.alchemy_host)
-        self.moicen_host = os.getenv("MOICEN_HOST", self.moicen_host)
-        self.huiwings_host = os.getenv("HUIWINGS_HOST", self.huiwings_host)
-        self.local_host = os.getenv("LOCAL_HOST", self.local_host)
+        # to_dict 结果缓存（首次调用时构建）
+        self._dict_cache: Optional[Mapping[str, object]] = None
     
     def validate(self) -> bool:
         """
@@ -162,15 +220,45 @@ class CozeConfig:
         if self.poll_interval <= 0:
             raise ValueError("poll_interval must be positive")
         
+        if self.http_max_connections <= 0:
+            raise ValueError("http_max_connections must be positive")
+        
+        if self.http_max_keepalive_connections < 0:
+            raise ValueError("http_max_keepalive_connections must be non-negative")
+        
+        if self.http_keepalive_expiry < 0:
+            raise ValueError("http_keepalive_expiry must be non-negative")
+        
         if self.session_expire <= 0:
             raise ValueError("session_expire must be positive")
         
         if self.result_expire <= 0:
             raise ValueError("result_expire must be positive")
         
+        if self.redis_max_connections <= 0:
+            raise ValueError("redis_max_connections must be positive")
+        
+        if self.redis_socket_connect_timeout <= 0:
+            raise ValueError("redis_socket_connect_timeout must be positive")
+        
+        if self.redis_health_check_interval < 0:
+            raise ValueError("redis_health_check_interval must be non-negative")
+        
+        if self.stats_cache_ttl < 0:
+            raise ValueError("stats_cache_ttl must be non-negative")
+        
+        if self.read_cache_ttl < 0:
+            raise ValueError("read_cache_ttl must be non-negative")
+        
+        if self.read_cache_size <= 0:
+            raise ValueError("read_cache_size must be positive")
+        
         if self.max_message_length <= 0:
             raise ValueError("max_message_length must be positive")
         
+        if self.stream_chats_threshold <= 0:
+            raise ValueError("stream_chats_threshold must be positive")
+        
         if self.max_sessions_per_user <= 0:
             raise ValueError("max_sessions_per_user must be positive")
         
@@ -183,50 +271,67 @@ class CozeConfig:
         if self.user_inactive_timeout <= 0:
             raise ValueError("user_inactive_timeout must be positive")
         
+        if self.auth_cache_ttl <= 0:
+            raise ValueError("auth_cache_ttl must be positive")
+        
+        if self.auth_cache_size <= 0:
+            raise ValueError("auth_cache_size must be positive")
+        
         return True
     
-    def to_dict(self) -> dict:
+    def to_dict(self) -> Mapping[str, object]:
         """
-        转换为字典格式
+        转换为字典格式（首次调用后缓存，返回只读映射）
         
         Returns:
-            dict: 配置字典
+            Mapping[str, object]: 只读配置字典
         """
-        return {
+        if self._dict_cache is not None:
+            return self._dict_cache
+        
+        self._dict_cache = MappingProxyType({
             'api_url': self.api_url,
             'bot_id': self.bot_id,
             'timeout': self.timeout,
             'max_retries': self.max_retries,
             'poll_interval': self.poll_interval,
+            'http_max_connections': self.http_max_connections,
+            'http_max_keepalive_connections': self.http_max_keepalive_connections,
+            'http_keepalive_expiry': self.http_keepalive_expiry,
             'redis_prefix': self.redis_prefix,
             'session_expire': self.session_expire,
             'result_expire': self.result_expire,
+            'redis_max_connections': self.redis_max_connections,
+            'redis_socket_connect_timeout': self.redis_socket_connect_timeout,
+            'redis_health_check_interval': self.redis_health_check_interval,
+            'stats_cache_ttl': self.stats_cache_ttl,
+            'read_cache_ttl': self.read_cache_ttl,
+            'read_cache_size': self.read_cache_size,
             'log_level': self.log_level,
             'log_format': self.log_format,
             'max_message_length': self.max_message_length,
+            'stream_chats_threshold': self.stream_chats_threshold,
             'max_sessions_per_user': self.max_sessions_per_user,
             'max_active_users': self.max_active_users,
             'max_total_sessions': self.max_total_sessions,
             'user_inactive_timeout': self.user_inactive_timeout,
-        }
-
-
-# 全局配置实例
-_config: Optional[CozeConfig] = None
+            'auth_cache_ttl': self.auth_cache_ttl,
+            'auth_cache_size': self.auth_cache_size,
+        })
+        return self._dict_cache
 
 
+@lru_cache(maxsize=1)
 def get_coze_config() -> CozeConfig:
     """
-    获取Coze配置实例（单例模式）
+    获取Coze配置实例（单例模式，由lru_cache缓存）
     
     Returns:
         CozeConfig: 配置实例
     """
-    global _config
-    if _config is None:
-        _config = CozeConfig()
-        _config.validate()
-    return _config
+    config = CozeConfig()
+    config.validate()
+    return config
 
 
 def reload_config() -> CozeConfig:
@@ -236,7 +341,5 @@ def reload_config() -> CozeConfig:
     Returns:
         CozeConfig: 新的配置实例
     """
-    global _config
-    _config = None
+    get_coze_config.cache_clear()
     return get_coze_config()
-
@@ -3,7 +3,6 @@
 import traceback
 from typing import Dict, Any, Optional
 from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
 
 from .logging_config import get_coze_logger, get_api_logger
 from .exceptions import (
@@ -11,6 +10,7 @@ from .exceptions import (
     CozeConfigError, CozeSessionError
 )
 from .utils import format_timestamp, get_current_timestamp
+from .responses import ORJSONResponse
 
 logger = get_coze_logger()
 
@@ -20,22 +20,22 @@ def create_error_response(error_message: str, status_code: int = 400,
                          task_id: Optional[str] = None,
                          details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """创建统一的错误响应格式"""
-    response_data = {
+    error = {
+        "message": error_message,
+        "code": error_code or f"COZE_ERROR_{status_code}",
+        "timestamp": format_timestamp(get_current_timestamp()),
+        "details": details,
+    }
+    if not details:
+        del error["details"]
+    
+    return {
         "success": False,
-        "error": {
-            "message": error_message,
-            "code": error_code or f"COZE_ERROR_{status_code}",
-            "timestamp": format_timestamp(get_current_timestamp()),
-        },
+        "error": error,
         "data": None,
         "task_id": task_id,
         "task_status": "failed" if task_id else None
     }
-    
-    if details:
-        response_data["error"]["details"] = details
-    
-    return response_data
 
 
 def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Dict[str, Any]:
@@ -49,7 +49,7 @@ def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Dic
 
 async def handle_coze_validation_error(request: Request, exc: CozeValidationError):
     """处理Coze验证错误"""
-    api_logger = get_api_logger(str(request.url))
+    api_logger = get_api_logger(request.url.path)
     api_logger.error(f"Validation error: {exc}")
     
     response_data = create_error_response(
@@ -58,12 +58,12 @@ async def handle_coze_validation_error(request: Request, exc: CozeValidationErro
         error_code="COZE_VALIDATION_ERROR",
         details=getattr(exc, 'details', None)
     )
-    return JSONResponse(status_code=400, content=response_data)
+    return ORJSONResponse(status_code=400, content=response_data)
 
 
 async def handle_coze_api_error(request: Request, exc: CozeAPIError):
     """处理Coze API错误"""
-    api_logger = get_api_logger(str(request.url))
+    api_logger = get_api_logger(request.url.path)
     api_logger.error(f"API error: {exc}")
     
     status_code = getattr(exc, 'status_code', 500)
@@ -76,12 +76,12 @@ async def handle_coze_api_error(request: Request, exc: CozeAPIError):
             "api_response": getattr(exc, 'response_data', None)
         }
     )
-    return JSONResponse(status_code=status_code, content=response_data)
+    return ORJSONResponse(status_code=status_code, content=response_data)
 
 
 async def handle_coze_redis_error(request: Request, exc: CozeRedisError):
     """处理Coze Redis错误"""
-    api_logger = get_api_logger(str(request.url))
+    api_logger = get_api_logger(request.url.path)
     api_logger.error(f"Redis error: {exc}")
     
     response_data = create_error_response(
@@ -93,12 +93,12 @@ async def handle_coze_redis_error(request: Request, exc: CozeRedisError):
             "service": "redis"
         }
     )
-    return JSONResponse(status_code=503, content=response_data)
+    return ORJSONResponse(status_code=503, content=response_data)
 
 
 async def handle_coze_config_error(request: Request, exc: CozeConfigError):
     """处理Coze配置错误"""
-    api_logger = get_api_logger(str(request.url))
+    api_logger = get_api_logger(request.url.path)
     api_logger.error(f"Config error: {exc}")
     
     response_data = create_error_response(
@@ -109,12 +109,12 @@ async def handle_coze_config_error(request: Request, exc: CozeConfigError):
             "config_issue": str(exc)
         }
     )
-    return JSONResponse(status_code=500, content=response_data)
+    return ORJSONResponse(status_code=500, content=response_data)
 
 
 async def handle_coze_session_error(request: Request, exc: CozeSessionError):
     """处理Coze会话错误"""
-    api_logger = get_api_logger(str(request.url))
+    api_logger = get_api_logger(request.url.path)
     api_logger.error(f"Session error: {exc}")
     
     response_data = create_error_response(
@@ -125,7 +125,7 @@ async def handle_coze_session_error(request: Request, exc: CozeSessionError):
             "session_id": getattr(exc, 'session_id', None)
         }
     )
-    return JSONResponse(status_code=400, content=response_data)
+    return ORJSONResponse(status_code=400, content=response_data)
 
 
 async def handle_http_exception(request: Request, exc: HTTPException):
@@ -135,18 +135,18 @@ async def handle_http_exception(request: Request, exc: HTTPException):
         status_code=exc.status_code,
         error_code=f"HTTP_{exc.status_code}"
     )
-    return JSONResponse(status_code=exc.status_code, content=response_data)
+    return ORJSONResponse(status_code=exc.status_code, content=response_data)
 
 
 async def handle_generic_exception(request: Request, exc: Exception):
     """处理通用异常"""
-    # 记录完整的错误堆栈
-    api_logger = get_api_logger(str(request.url))
-    api_logger.error(
-        f"Unhandled exception in Coze module: {str(exc)}",
+    # 记录完整的错误堆栈（由loguru在输出时格式化异常，无需预先生成traceback字符串）
+    api_logger = get_api_logger(request.url.path)
+    api_logger.opt(exception=exc).error(
+        "Unhandled exception in Coze module: {}",
+        exc,
         extra={
             "exception_type": type(exc).__name__,
-            "traceback": traceback.format_exc(),
             "request_path": str(request.url),
             "request_method": request.method
         }
@@ -172,7 +172,7 @@ async def handle_generic_exception(request: Request, exc: Exception):
         error_code="INTERNAL_SERVER_ERROR",
         details=details
     )
-    return JSONResponse(status_code=500, content=response_data)
+    return ORJSONResponse(status_code=500, content=response_data)
 
 
 def register_error_handlers(app):
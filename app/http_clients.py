@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Coze模块共享HTTP客户端
+Coze API调用与JWT验证各使用一个进程内共享的 httpx.AsyncClient，复用keep-alive连接，
+避免每次请求都重新建立TCP/TLS连接
+"""
+
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from .config import get_coze_config
+
+# 已安装 h2 时启用HTTP/2（轮询请求可复用同一连接多路复用）
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Coze API客户端（默认携带认证请求头）
+_coze_client: Optional[httpx.AsyncClient] = None
+
+# JWT验证客户端
+_auth_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_coze_client() -> httpx.AsyncClient:
+    """
+    创建Coze API调用使用的异步HTTP客户端
+
+    Returns:
+        httpx.AsyncClient: 带默认请求头和连接池的客户端
+    """
+    config = get_coze_config()
+    return httpx.AsyncClient(
+        timeout=config.timeout,
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry
+        ),
+        headers={
+            'Authorization': config.authorization,
+            'Content-Type': 'application/json',
+            'User-Agent': 'CozeModule/1.0.0'
+        }
+    )
+
+
+def _create_auth_client() -> httpx.AsyncClient:
+    """
+    创建JWT验证使用的异步HTTP客户端
+
+    Returns:
+        httpx.AsyncClient: 启用keep-alive连接池的客户端
+    """
+    return httpx.AsyncClient(
+        timeout=get_coze_config().timeout,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+
+
+def get_coze_http_client() -> httpx.AsyncClient:
+    """
+    获取Coze API调用使用的共享HTTP客户端（未初始化时创建）
+
+    Returns:
+        httpx.AsyncClient: 共享客户端
+    """
+    global _coze_client
+    if _coze_client is None:
+        _coze_client = _create_coze_client()
+    return _coze_client
+
+
+def get_auth_http_client() -> httpx.AsyncClient:
+    """
+    获取JWT验证使用的共享HTTP客户端（未初始化时创建）
+
+    Returns:
+        httpx.AsyncClient: 共享客户端
+    """
+    global _auth_client
+    if _auth_client is None:
+        _auth_client = _create_auth_client()
+    return _auth_client
+
+
+async def init_http_clients() -> None:
+    """
+    初始化共享HTTP客户端（应用启动时调用）
+    """
+    get_coze_http_client()
+    get_auth_http_client()
+
+
+async def close_http_clients() -> None:
+    """
+    关闭共享HTTP客户端（应用关闭时调用）
+    """
+    global _coze_client, _auth_client
+    if _coze_client is not None:
+        await _coze_client.aclose()
+        _coze_client = None
+    if _auth_client is not None:
+        await _auth_client.aclose()
+        _auth_client = None
@@ -2,21 +2,43 @@
 
 import os
 import sys
+from contextvars import ContextVar
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 from typing import Optional, Dict, Any
 
 from .config import get_coze_config
 
+# 项目根目录（app 目录的上一级）
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 当前请求ID（由请求上下文中间件设置，日志记录时自动注入到 extra 中）
+request_id_var: ContextVar[Optional[str]] = ContextVar("coze_request_id", default=None)
+
+
+def _inject_request_id(record) -> None:
+    """日志patcher：将当前请求ID注入日志记录"""
+    request_id = request_id_var.get()
+    if request_id is not None:
+        record["extra"].setdefault("request_id", request_id)
+
 
 class CozeLogger:
     """Coze模块专用日志管理器"""
     
     def __init__(self):
         self.config = get_coze_config()
-        self.logger = logger
+        self.logger = logger.patch(_inject_request_id)
         self._configured = False
         self._log_dir: Optional[Path] = None
+        self._unified_log: Optional[Path] = None
+        # 需要记录的模块名前缀（str.startswith支持元组，单次调用完成匹配）
+        self._prefixes = ("app", "coze")
+        # 按端点缓存绑定后的API日志记录器，避免每次请求重复bind
+        self._api_logger_for = lru_cache(maxsize=512)(self._bind_api_logger)
+        # 配置日志级别对应的数值，用于在热路径上提前判断是否需要构建日志参数
+        self._level_no = logger.level(self.config.log_level.upper()).no
     
     def configure(self, log_dir: Optional[str] = None) -> None:
         """配置日志系统
@@ -32,8 +54,8 @@ class CozeLogger:
             self._log_dir = Path(log_dir)
         else:
             # 默认在项目根目录下创建logs目录（统一日志目录）
-            project_root = Path(__file__).parent.parent
-            self._log_dir = project_root / "logs"
+            self._log_dir = PROJECT_ROOT / "logs"
+        self._unified_log = self._log_dir / "coze-fastapi.log"
         
         # 确保日志目录存在
         self._log_dir.mkdir(parents=True, exist_ok=True)
@@ -41,9 +63,6 @@ class CozeLogger:
         # 不要移除默认处理器，避免影响主应用日志
         # self.logger.remove()  # 注释掉，保留主应用的日志处理器
         
-        # 获取项目根目录路径
-        project_root = Path(__file__).parent.parent
-        
         # 添加控制台处理器
         self._add_console_handler()
         
@@ -53,8 +72,7 @@ class CozeLogger:
         self._configured = True
         
         # 记录配置完成
-        unified_log_file = self._log_dir / "coze-fastapi.log"
-        self.logger.info(f"Coze logger configured, unified log file: {unified_log_file}")
+        self.logger.info(f"Coze logger configured, unified log file: {self._unified_log}")
     
     def _add_console_handler(self) -> None:
         """添加控制台日志处理器"""
@@ -71,14 +89,14 @@ class CozeLogger:
             format=console_format,
             level=self.config.log_level,
             colorize=True,
-            backtrace=True,
-            diagnose=True,
+            backtrace=False,
+            diagnose=False,
             filter=self._coze_filter
         )
     
     def _add_file_handlers(self) -> None:
         """添加文件日志处理器"""
-        if self._log_dir is None:
+        if self._unified_log is None:
             raise RuntimeError("Log directory not configured")
             
         file_format = (
@@ -90,30 +108,15 @@ class CozeLogger:
         )
         
         # 统一日志文件（所有日志集中在一个文件）
-        unified_log_file = self._log_dir / "coze-fastapi.log"
         self.logger.add(
-            unified_log_file,
+            self._unified_log,
             format=file_format,
             level=self.config.log_level,
             rotation="50 MB",
             retention="30 days",
             compression="zip",
-            backtrace=True,
-            diagnose=True,
-            filter=self._coze_filter,
-            encoding="utf-8"
-        )
-        
-        # 按日期分割的日志文件（用于归档）
-        self.logger.add(
-            self._log_dir / "coze-fastapi_{time:YYYY-MM-DD}.log",
-            format=file_format,
-            level=self.config.log_level,
-            rotation="00:00",
-            retention="30 days",
-            compression="zip",
-            backtrace=True,
-            diagnose=True,
+            backtrace=False,
+            diagnose=False,
             filter=self._coze_filter,
             encoding="utf-8"
         )
@@ -128,12 +131,18 @@ class CozeLogger:
             bool: 是否记录该日志
         """
         # 只记录coze模块相关的日志
-        module_name = record.get("name", "")
-        return (
-            module_name.startswith("app") or
-            module_name.startswith("coze") or
-            "coze" in module_name.lower()
-        )
+        return record.get("name", "").startswith(self._prefixes)
+    
+    def is_enabled_for(self, level: str) -> bool:
+        """判断指定级别的日志是否会被Coze日志处理器记录
+        
+        Args:
+            level: 日志级别名称，如 "INFO"
+            
+        Returns:
+            bool: 该级别是否不低于配置的日志级别
+        """
+        return logger.level(level).no >= self._level_no
     
     def get_logger(self, name: Optional[str] = None):
         """获取日志记录器
@@ -151,25 +160,32 @@ class CozeLogger:
             return self.logger.bind(name=name)
         return self.logger
     
+    def _bind_api_logger(self, endpoint: str):
+        """为API端点绑定日志上下文
+        
+        Args:
+            endpoint: API端点
+            
+        Returns:
+            logger: 绑定了端点信息的日志记录器
+        """
+        return self.get_logger().bind(endpoint=endpoint, component="api")
+    
     def create_api_logger(self, endpoint: str, request_id: Optional[str] = None):
         """为API请求创建专用日志记录器
         
         Args:
-            endpoint: API端点
+            endpoint: API端点（请使用URL路径，不含查询参数，以便复用缓存）
             request_id: 请求ID
             
         Returns:
             logger: API专用日志记录器
         """
-        bind_data = {
-            "endpoint": endpoint,
-            "component": "api"
-        }
+        api_logger = self._api_logger_for(endpoint)
         
         if request_id:
-            bind_data["request_id"] = request_id
-        
-        return self.get_logger().bind(**bind_data)
+            return api_logger.bind(request_id=request_id)
+        return api_logger
 
 
 # 全局日志管理器实例
@@ -197,6 +213,18 @@ def configure_coze_logging(log_dir: Optional[str] = None) -> None:
     _coze_logger.configure(log_dir)
 
 
+def is_log_level_enabled(level: str) -> bool:
+    """判断指定级别的日志是否启用
+    
+    Args:
+        level: 日志级别名称
+        
+    Returns:
+        bool: 是否启用
+    """
+    return _coze_logger.is_enabled_for(level)
+
+
 def get_api_logger(endpoint: str, request_id: Optional[str] = None):
     """获取API专用日志记录器
     
@@ -3,16 +3,19 @@ FastAPI应用入口
 """
 
 import os
-import uuid
+import orjson
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, Response
 
 from .config import get_coze_config
-from .logging_config import get_coze_logger, configure_coze_logging as configure_logging, get_api_logger
+from .logging_config import get_coze_logger, configure_coze_logging as configure_logging
 from .error_handlers import register_error_handlers
 from .routes import router
 from .redis_client import get_coze_redis_client, reset_redis_client
+from .responses import ORJSONResponse
+from .middleware import RequestContextMiddleware, StaticCORSMiddleware
+from .auth import AuthASGIMiddleware
+from .http_clients import init_http_clients, close_http_clients
 
 
 @asynccontextmanager
@@ -25,12 +28,9 @@ async def lifespan(app: FastAPI):
     # 配置日志
     configure_logging()
     
-    # 初始化配置
-    get_coze_config()
-    
-    # 验证配置
+    # 初始化并验证配置
     config = get_coze_config()
-    logger.info(f"Coze module initialized with config: {config.api_url}")
+    logger.info("Coze module initialized with config: {}", config.api_url)
     
     # 测试Redis连接
     try:
@@ -38,7 +38,10 @@ async def lifespan(app: FastAPI):
         await redis_client.redis_client.ping()
         logger.info("Coze Redis connection verified")
     except Exception as e:
-        logger.warning(f"Coze Redis connection test failed: {e}")
+        logger.warning("Coze Redis connection test failed: {}", e)
+    
+    # 初始化Coze API调用和JWT验证使用的共享HTTP客户端
+    await init_http_clients()
     
     logger.info("Coze FastAPI application started successfully")
     
@@ -47,6 +50,7 @@ async def lifespan(app: FastAPI):
     # 关闭时
     logger.info("Shutting down Coze FastAPI application...")
     await reset_redis_client()
+    await close_http_clients()
     logger.info("Coze FastAPI application shut down")
 
 
@@ -55,53 +59,19 @@ app = FastAPI(
     title="Coze API Service",
     description="Coze API service using FastAPI",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# 注册CORS中间件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# 注册认证中间件（需先于CORS注册，使CORS位于外层并处理预检请求）
+# 中间件在构建中间件栈时读取配置，未启用认证时直接透传
+app.add_middleware(AuthASGIMiddleware)
 
+# 注册CORS中间件（允许所有来源、方法和请求头）
+app.add_middleware(StaticCORSMiddleware)
 
-@app.middleware("http")
-async def before_request(request: Request, call_next):
-    """请求前处理"""
-    # 生成请求ID
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    
-    # 创建请求专用日志记录器
-    request.state.logger = get_api_logger(request.url.path, request_id)
-    
-    # 记录请求开始
-    request.state.logger.info(
-        f"Request started: {request.method} {request.url.path}",
-        extra={
-            "method": request.method,
-            "path": request.url.path,
-            "remote_addr": request.client.host if request.client else None,
-            "user_agent": request.headers.get('User-Agent', ''),
-            "content_type": request.headers.get('Content-Type', '')
-        }
-    )
-    
-    response = await call_next(request)
-    
-    # 记录请求完成
-    if hasattr(request.state, 'logger'):
-        request.state.logger.info(
-            f"Request completed: {response.status_code}",
-            extra={
-                "status_code": response.status_code,
-            }
-        )
-    
-    return response
+# 注册请求上下文中间件（最外层，记录所有请求）
+app.add_middleware(RequestContextMiddleware)
 
 
 # 注册路由
@@ -111,14 +81,18 @@ app.include_router(router)
 register_error_handlers(app)
 
 
+# 根路径响应内容固定，导入时只序列化一次；响应对象每次新建，避免中间件修改共享的响应头
+_ROOT_BODY = orjson.dumps({
+    "service": "coze-fastapi",
+    "version": "1.0.0",
+    "status": "running"
+})
+
+
 @app.get("/")
 async def root():
     """根路径"""
-    return {
-        "service": "coze-fastapi",
-        "version": "1.0.0",
-        "status": "running"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -127,11 +101,21 @@ if __name__ == "__main__":
     # 从环境变量获取端口，默认6000
     port = int(os.getenv("PORT", "6000"))
     host = os.getenv("HOST", "0.0.0.0")
+    # worker进程数，默认1（reload模式下只能使用单进程）
+    workers = int(os.getenv("WORKERS", "1"))
     
+    # 显式使用 uvloop 事件循环和 httptools 解析器（由 uvicorn[standard] 提供，缺失时启动失败）
+    # 请求日志已由 RequestContextMiddleware 记录，关闭uvicorn访问日志避免每个请求重复输出
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
+        loop="uvloop",
+        http="httptools",
+        interface="asgi3",
+        server_header=False,
+        access_log=False,
+        workers=workers,
         reload=os.getenv("DEBUG", "false").lower() == "true"
     )
 
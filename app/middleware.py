@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Coze模块请求上下文中间件
+为每个请求生成请求ID并记录请求开始和完成日志
+"""
+
+import os
+
+from .logging_config import get_api_logger, is_log_level_enabled, request_id_var
+
+
+class RequestContextMiddleware:
+    """
+    纯ASGI请求上下文中间件
+    请求ID和请求专用日志记录器保存在 scope["state"] 中，路由内可通过 request.state 访问
+    """
+
+    def __init__(self, app):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+        """
+        self.app = app
+        # 日志级别在启动时确定；未启用INFO时跳过请求头解析和extra字典构建
+        self._log_info = is_log_level_enabled("INFO")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 生成请求ID
+        request_id = os.urandom(16).hex()
+        path = scope["path"]
+
+        # 获取端点日志记录器（按路径缓存），请求ID通过ContextVar注入到该请求内的所有日志
+        request_logger = get_api_logger(path)
+
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["logger"] = request_logger
+
+        token = request_id_var.set(request_id)
+        if not self._log_info:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                request_id_var.reset(token)
+            return
+
+        # 记录请求开始（直接遍历ASGI原始请求头，无需构建Request/Headers对象）
+        user_agent = ""
+        content_type = ""
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+            elif name == b"content-type":
+                content_type = value.decode("latin-1")
+        client = scope.get("client")
+
+        request_logger.info(
+            "Request started: {} {}",
+            scope["method"],
+            path,
+            extra={
+                "method": scope["method"],
+                "path": path,
+                "remote_addr": client[0] if client else None,
+                "user_agent": user_agent,
+                "content_type": content_type
+            }
+        )
+
+        async def send_wrapper(message):
+            # 记录请求完成
+            if message["type"] == "http.response.start":
+                request_logger.info(
+                    "Request completed: {}",
+                    message["status"],
+                    extra={
+                        "status_code": message["status"],
+                    }
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+class StaticCORSMiddleware:
+    """
+    纯ASGI静态CORS中间件
+    等价于 CORSMiddleware(allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])，
+    CORS响应头预先构建为bytes元组，每个响应只需追加请求Origin
+    """
+
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+    def __init__(self, app, max_age: int = 600):
+        """
+        初始化中间件
+
+        Args:
+            app: 下游ASGI应用
+            max_age: 预检请求结果的缓存时间（秒）
+        """
+        self.app = app
+        # 普通跨域请求追加的响应头（允许携带凭证时需回显请求Origin，不能使用"*"）
+        self._simple_headers = (
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        )
+        # 预检请求的响应头
+        self._preflight_headers = (
+            (b"access-control-allow-methods", self.ALLOW_METHODS),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin, Access-Control-Request-Method, Access-Control-Request-Headers"),
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", b"2"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        # 非跨域请求不做处理
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 预检请求直接返回
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            headers = [(b"access-control-allow-origin", origin)]
+            headers.extend(self._preflight_headers)
+            if request_headers is not None:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b"OK"})
+            return
+
+        simple_headers = self._simple_headers
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # 构建新的响应头列表，不修改下游传入的列表
+                headers = list(message.get("headers", ()))
+                headers.append((b"access-control-allow-origin", origin))
+                headers.extend(simple_headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -4,28 +4,48 @@ Coze模块数据模型
 定义会话、聊天和用户相关的数据结构
 """
 
-from dataclasses import dataclass, field, asdict
-from typing import Optional, Dict, Any, List, Union
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Set
+import math
+import time
 from datetime import datetime
-from enum import Enum
+from itertools import repeat
 
 from .utils import (
     generate_session_id, generate_chat_id, get_current_timestamp, 
-    format_timestamp, validate_message, validate_session_id, validate_user_id
+    format_timestamp, current_timestamp_str, validate_message, validate_session_id, validate_user_id
 )
 from .exceptions import CozeValidationError
 
 
-class SessionStatus(Enum):
-    """会话状态枚举"""
+def _unchecked_new(cls, **fields):
+    """跳过 __init__/__post_init__ 直接创建实例（仅用于已校验过的可信数据）"""
+    obj = object.__new__(cls)
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def _iso_to_epoch(value: str) -> Optional[float]:
+    """将ISO格式时间字符串解析为epoch秒，解析失败返回None"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except Exception:
+        return None
+
+
+# 状态和角色使用普通字符串常量（序列化、比较和从Redis恢复时无需枚举转换）
+
+class SessionStatus:
+    """会话状态常量"""
     ACTIVE = "active"          # 活跃状态
     INACTIVE = "inactive"      # 非活跃状态
     EXPIRED = "expired"        # 已过期
     TERMINATED = "terminated"  # 已终止
 
 
-class ChatStatus(Enum):
-    """聊天状态枚举"""
+class ChatStatus:
+    """聊天状态常量"""
     PENDING = "pending"        # 等待中
     PROCESSING = "processing"  # 处理中
     COMPLETED = "completed"    # 已完成
@@ -33,17 +53,26 @@ class ChatStatus(Enum):
     CANCELLED = "cancelled"    # 已取消
 
 
-class MessageRole(Enum):
-    """消息角色枚举"""
+class MessageRole:
+    """消息角色常量"""
     USER = "user"              # 用户消息
     ASSISTANT = "assistant"    # 助手消息
     SYSTEM = "system"          # 系统消息
 
 
-@dataclass
+_VALID_SESSION_STATUSES = frozenset({
+    SessionStatus.ACTIVE, SessionStatus.INACTIVE, SessionStatus.EXPIRED, SessionStatus.TERMINATED
+})
+_VALID_CHAT_STATUSES = frozenset({
+    ChatStatus.PENDING, ChatStatus.PROCESSING, ChatStatus.COMPLETED, ChatStatus.FAILED, ChatStatus.CANCELLED
+})
+_VALID_MESSAGE_ROLES = frozenset({MessageRole.USER, MessageRole.ASSISTANT, MessageRole.SYSTEM})
+
+
+@dataclass(slots=True, eq=False, repr=False)
 class CozeMessage:
     """Coze消息模型"""
-    role: MessageRole
+    role: str
     content: str
     timestamp: Optional[str] = None
     message_id: Optional[str] = None
@@ -52,7 +81,7 @@ class CozeMessage:
     def __post_init__(self):
         """初始化后处理"""
         if self.timestamp is None:
-            self.timestamp = format_timestamp(get_current_timestamp())
+            self.timestamp = current_timestamp_str()
         
         if self.message_id is None:
             self.message_id = generate_chat_id()
@@ -64,17 +93,14 @@ class CozeMessage:
         if not validate_message(self.content):
             raise CozeValidationError(f"Invalid message content: {self.content}")
         
-        # 确保role是MessageRole枚举
-        if isinstance(self.role, str):
-            try:
-                self.role = MessageRole(self.role)
-            except ValueError:
-                raise CozeValidationError(f"Invalid message role: {self.role}")
+        # 验证消息角色
+        if self.role not in _VALID_MESSAGE_ROLES:
+            raise CozeValidationError(f"Invalid message role: {self.role}")
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
-            'role': self.role.value,
+            'role': self.role,
             'content': self.content,
             'timestamp': self.timestamp,
             'message_id': self.message_id,
@@ -82,10 +108,26 @@ class CozeMessage:
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CozeMessage':
-        """从字典创建实例"""
+    def from_dict(cls, data: Dict[str, Any], validate: bool = True) -> 'CozeMessage':
+        """从字典创建实例
+        
+        Args:
+            data: 字典数据
+            validate: 是否校验字段，读取Redis中已校验过的数据时可传False，
+                此时跳过 __init__/__post_init__ 直接构建实例
+        """
+        if not validate:
+            return _unchecked_new(
+                cls,
+                role=data['role'],
+                content=data['content'],
+                timestamp=data.get('timestamp'),
+                message_id=data.get('message_id'),
+                metadata=data.get('metadata') or {}
+            )
+        
         return cls(
-            role=MessageRole(data['role']),
+            role=data['role'],
             content=data['content'],
             timestamp=data.get('timestamp'),
             message_id=data.get('message_id'),
@@ -105,13 +147,13 @@ class CozeMessage:
         return self.role == MessageRole.ASSISTANT
 
 
-@dataclass
+@dataclass(slots=True, eq=False, repr=False)
 class CozeChat:
     """Coze聊天模型"""
     chat_id: str
     session_id: str
     user_message: CozeMessage
-    status: ChatStatus = ChatStatus.PENDING
+    status: str = ChatStatus.PENDING
     assistant_message: Optional[CozeMessage] = None
     content: Optional[str] = None  # AI回答内容
     reasoning_content: Optional[str] = None  # 思考过程
@@ -121,16 +163,25 @@ class CozeChat:
     completed_at: Optional[str] = None
     error_message: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    # 时间戳对应的epoch秒缓存（首次使用时解析）
+    _created_ts: Optional[float] = field(init=False, repr=False, default=None)
+    _completed_ts: Optional[float] = field(init=False, repr=False, default=None)
+    # 所属会话（由 CozeSession 关联，用于维护会话的聊天状态计数）
+    _session: Optional['CozeSession'] = field(init=False, repr=False, default=None)
     
     def __post_init__(self):
         """初始化后处理"""
-        current_time = format_timestamp(get_current_timestamp())
-        
-        if self.created_at is None:
-            self.created_at = current_time
-        
-        if self.updated_at is None:
-            self.updated_at = current_time
+        # 仅在需要补全时间戳时才获取当前时间（从Redis恢复的数据通常已包含时间戳）
+        if self.created_at is None or self.updated_at is None:
+            now = get_current_timestamp()
+            current_time = format_timestamp(now)
+            
+            if self.created_at is None:
+                self.created_at = current_time
+                self._created_ts = now.timestamp()
+            
+            if self.updated_at is None:
+                self.updated_at = current_time
         
         if self.metadata is None:
             self.metadata = {}
@@ -142,12 +193,9 @@ class CozeChat:
         if not validate_session_id(self.session_id):
             raise CozeValidationError(f"Invalid session ID: {self.session_id}")
         
-        # 确保status是ChatStatus枚举
-        if isinstance(self.status, str):
-            try:
-                self.status = ChatStatus(self.status)
-            except ValueError:
-                raise CozeValidationError(f"Invalid chat status: {self.status}")
+        # 验证聊天状态
+        if self.status not in _VALID_CHAT_STATUSES:
+            raise CozeValidationError(f"Invalid chat status: {self.status}")
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -155,7 +203,7 @@ class CozeChat:
             'chat_id': self.chat_id,
             'session_id': self.session_id,
             'user_message': self.user_message.to_dict(),
-            'status': self.status.value,
+            'status': self.status,
             'assistant_message': self.assistant_message.to_dict() if self.assistant_message else None,
             'content': self.content,
             'reasoning_content': self.reasoning_content,
@@ -168,18 +216,45 @@ class CozeChat:
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CozeChat':
-        """从字典创建实例"""
-        user_message = CozeMessage.from_dict(data['user_message'])
+    def from_dict(cls, data: Dict[str, Any], validate: bool = True) -> 'CozeChat':
+        """从字典创建实例
+        
+        Args:
+            data: 字典数据
+            validate: 是否校验字段，读取Redis中已校验过的数据时可传False，
+                此时跳过 __init__/__post_init__ 直接构建实例
+        """
+        user_message = CozeMessage.from_dict(data['user_message'], validate)
         assistant_message = None
         if data.get('assistant_message'):
-            assistant_message = CozeMessage.from_dict(data['assistant_message'])
+            assistant_message = CozeMessage.from_dict(data['assistant_message'], validate)
+        
+        if not validate:
+            return _unchecked_new(
+                cls,
+                chat_id=data['chat_id'],
+                session_id=data['session_id'],
+                user_message=user_message,
+                status=data['status'],
+                assistant_message=assistant_message,
+                content=data.get('content'),
+                reasoning_content=data.get('reasoning_content'),
+                follow_up_questions=data.get('follow_up_questions') or [],
+                created_at=data.get('created_at'),
+                updated_at=data.get('updated_at'),
+                completed_at=data.get('completed_at'),
+                error_message=data.get('error_message'),
+                metadata=data.get('metadata') or {},
+                _created_ts=None,
+                _completed_ts=None,
+                _session=None
+            )
         
         return cls(
             chat_id=data['chat_id'],
             session_id=data['session_id'],
             user_message=user_message,
-            status=ChatStatus(data['status']),
+            status=data['status'],
             assistant_message=assistant_message,
             content=data.get('content'),
             reasoning_content=data.get('reasoning_content'),
@@ -191,16 +266,22 @@ class CozeChat:
             metadata=data.get('metadata', {})
         )
     
-    def update_status(self, status: ChatStatus, error_message: Optional[str] = None):
+    def update_status(self, status: str, error_message: Optional[str] = None):
         """更新聊天状态"""
+        old_status = self.status
         self.status = status
-        self.updated_at = format_timestamp(get_current_timestamp())
+        now = get_current_timestamp()
+        self.updated_at = format_timestamp(now)
         
         if error_message:
             self.error_message = error_message
         
         if status == ChatStatus.COMPLETED:
             self.completed_at = self.updated_at
+            self._completed_ts = now.timestamp()
+        
+        if self._session is not None:
+            self._session._on_chat_status_change(old_status, status)
     
     def set_assistant_message(self, content: str, metadata: Optional[Dict[str, Any]] = None):
         """设置助手回复消息"""
@@ -247,20 +328,22 @@ class CozeChat:
         if not self.completed_at or not self.created_at:
             return None
         
-        try:
-            created = datetime.fromisoformat(self.created_at.replace('Z', '+00:00'))
-            completed = datetime.fromisoformat(self.completed_at.replace('Z', '+00:00'))
-            return (completed - created).total_seconds()
-        except Exception:
+        if self._created_ts is None:
+            self._created_ts = _iso_to_epoch(self.created_at)
+        if self._completed_ts is None:
+            self._completed_ts = _iso_to_epoch(self.completed_at)
+        
+        if self._created_ts is None or self._completed_ts is None:
             return None
+        return self._completed_ts - self._created_ts
 
 
-@dataclass
+@dataclass(slots=True, eq=False, repr=False)
 class CozeSession:
     """Coze会话模型"""
     session_id: str
     user_id: str
-    status: SessionStatus = SessionStatus.ACTIVE
+    status: str = SessionStatus.ACTIVE
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
     last_activity_at: Optional[str] = None
@@ -268,19 +351,31 @@ class CozeSession:
     chat_history: List[CozeChat] = field(default_factory=list)
     context: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
+    # 时间戳对应的epoch秒缓存（首次使用时解析）
+    _created_ts: Optional[float] = field(init=False, repr=False, default=None)
+    _last_activity_ts: Optional[float] = field(init=False, repr=False, default=None)
+    _expires_ts: Optional[float] = field(init=False, repr=False, default=None)
+    # 已完成/失败的聊天数量（随 add_chat 和聊天状态变化增量维护）
+    _completed_count: int = field(init=False, repr=False, default=0)
+    _failed_count: int = field(init=False, repr=False, default=0)
     
     def __post_init__(self):
         """初始化后处理"""
-        current_time = format_timestamp(get_current_timestamp())
-        
-        if self.created_at is None:
-            self.created_at = current_time
-        
-        if self.updated_at is None:
-            self.updated_at = current_time
-        
-        if self.last_activity_at is None:
-            self.last_activity_at = current_time
+        # 仅在需要补全时间戳时才获取当前时间（从Redis恢复的数据通常已包含时间戳）
+        if self.created_at is None or self.updated_at is None or self.last_activity_at is None:
+            now = get_current_timestamp()
+            current_time = format_timestamp(now)
+            
+            if self.created_at is None:
+                self.created_at = current_time
+                self._created_ts = now.timestamp()
+            
+            if self.updated_at is None:
+                self.updated_at = current_time
+            
+            if self.last_activity_at is None:
+                self.last_activity_at = current_time
+                self._last_activity_ts = now.timestamp()
         
         if self.context is None:
             self.context = {}
@@ -288,6 +383,9 @@ class CozeSession:
         if self.metadata is None:
             self.metadata = {}
         
+        for chat in self.chat_history:
+            self._attach_chat(chat)
+        
         # 验证用户ID
         if not validate_user_id(self.user_id):
             raise CozeValidationError(f"Invalid user ID: {self.user_id}")
@@ -296,39 +394,66 @@ class CozeSession:
         if not validate_session_id(self.session_id):
             raise CozeValidationError(f"Invalid session ID: {self.session_id}")
         
-        # 确保status是SessionStatus枚举
-        if isinstance(self.status, str):
-            try:
-                self.status = SessionStatus(self.status)
-            except ValueError:
-                raise CozeValidationError(f"Invalid session status: {self.status}")
+        # 验证会话状态
+        if self.status not in _VALID_SESSION_STATUSES:
+            raise CozeValidationError(f"Invalid session status: {self.status}")
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
             'session_id': self.session_id,
             'user_id': self.user_id,
-            'status': self.status.value,
+            'status': self.status,
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'last_activity_at': self.last_activity_at,
             'expires_at': self.expires_at,
-            'chat_history': [chat.to_dict() for chat in self.chat_history],
+            # 过期时间的epoch秒，读取后可直接与 time.time() 比较，无需再解析ISO字符串
+            'expires_at_ts': self._expires_at_ts(),
+            # map在C层循环，长聊天历史下快于列表推导式
+            'chat_history': list(map(CozeChat.to_dict, self.chat_history)),
             'context': self.context,
             'metadata': self.metadata
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CozeSession':
-        """从字典创建实例"""
-        chat_history = []
-        if data.get('chat_history'):
-            chat_history = [CozeChat.from_dict(chat_data) for chat_data in data['chat_history']]
-        
-        return cls(
+    def from_dict(cls, data: Dict[str, Any], validate: bool = True) -> 'CozeSession':
+        """从字典创建实例
+        
+        Args:
+            data: 字典数据
+            validate: 是否校验字段，读取Redis中已校验过的数据时可传False，
+                此时跳过 __init__/__post_init__ 直接构建实例
+        """
+        chat_history = list(map(CozeChat.from_dict, data.get('chat_history') or (), repeat(validate)))
+        
+        if not validate:
+            session = _unchecked_new(
+                cls,
+                session_id=data['session_id'],
+                user_id=data['user_id'],
+                status=data['status'],
+                created_at=data.get('created_at'),
+                updated_at=data.get('updated_at'),
+                last_activity_at=data.get('last_activity_at'),
+                expires_at=data.get('expires_at'),
+                chat_history=chat_history,
+                context=data.get('context') or {},
+                metadata=data.get('metadata') or {},
+                _created_ts=None,
+                _last_activity_ts=None,
+                _expires_ts=data.get('expires_at_ts'),
+                _completed_count=0,
+                _failed_count=0
+            )
+            for chat in chat_history:
+                session._attach_chat(chat)
+            return session
+        
+        session = cls(
             session_id=data['session_id'],
             user_id=data['user_id'],
-            status=SessionStatus(data['status']),
+            status=data['status'],
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at'),
             last_activity_at=data.get('last_activity_at'),
@@ -337,12 +462,16 @@ class CozeSession:
             context=data.get('context', {}),
             metadata=data.get('metadata', {})
         )
+        session._expires_ts = data.get('expires_at_ts')
+        return session
     
     def update_activity(self):
         """更新活动时间"""
-        current_time = format_timestamp(get_current_timestamp())
+        now = get_current_timestamp()
+        current_time = format_timestamp(now)
         self.last_activity_at = current_time
         self.updated_at = current_time
+        self._last_activity_ts = now.timestamp()
     
     def add_chat(self, chat: CozeChat):
         """添加聊天记录"""
@@ -350,8 +479,29 @@ class CozeSession:
             raise CozeValidationError(f"Chat session ID {chat.session_id} does not match session {self.session_id}")
         
         self.chat_history.append(chat)
+        self._attach_chat(chat)
         self.update_activity()
     
+    def _attach_chat(self, chat: CozeChat):
+        """关联聊天记录到本会话，并计入其当前状态"""
+        chat._session = self
+        self._on_chat_status_change(None, chat.status)
+    
+    def _on_chat_status_change(self, old_status: Optional[str], new_status: str):
+        """聊天状态变化时更新完成/失败计数"""
+        if old_status == new_status:
+            return
+        
+        if old_status == ChatStatus.COMPLETED:
+            self._completed_count -= 1
+        elif old_status == ChatStatus.FAILED:
+            self._failed_count -= 1
+        
+        if new_status == ChatStatus.COMPLETED:
+            self._completed_count += 1
+        elif new_status == ChatStatus.FAILED:
+            self._failed_count += 1
+    
     def get_latest_chat(self) -> Optional[CozeChat]:
         """获取最新的聊天记录"""
         return self.chat_history[-1] if self.chat_history else None
@@ -362,11 +512,11 @@ class CozeSession:
     
     def get_completed_chat_count(self) -> int:
         """获取已完成的聊天数量"""
-        return sum(1 for chat in self.chat_history if chat.is_completed())
+        return self._completed_count
     
     def get_failed_chat_count(self) -> int:
         """获取失败的聊天数量"""
-        return sum(1 for chat in self.chat_history if chat.is_failed())
+        return self._failed_count
     
     def is_active(self) -> bool:
         """是否为活跃状态"""
@@ -377,27 +527,47 @@ class CozeSession:
         if self.status == SessionStatus.EXPIRED:
             return True
         
-        if self.expires_at:
-            try:
-                expires = datetime.fromisoformat(self.expires_at.replace('Z', '+00:00'))
-                return datetime.now(expires.tzinfo) > expires
-            except Exception:
-                return False
+        return self.is_past_expiry()
+    
+    def get_expires_timestamp(self) -> Optional[float]:
+        """获取过期时间的epoch秒（未设置或无法解析时返回None）"""
+        if self.expires_at and self._expires_ts is None:
+            self._expires_ts = _iso_to_epoch(self.expires_at)
+        return self._expires_ts if self.expires_at else None
+    
+    def is_past_expiry(self, now: Optional[float] = None) -> bool:
+        """是否已超过过期时间（不考虑会话状态）
         
-        return False
+        Args:
+            now: 当前epoch秒，批量检查时可由调用方传入以避免重复获取
+        """
+        expires_ts = self.get_expires_timestamp()
+        if expires_ts is None:
+            return False
+        return (time.time() if now is None else now) > expires_ts
+    
+    def _expires_at_ts(self) -> Optional[int]:
+        """序列化用的过期时间epoch秒（向上取整，不会早于实际过期时间）"""
+        expires_ts = self.get_expires_timestamp()
+        return math.ceil(expires_ts) if expires_ts is not None else None
     
     def terminate(self, reason: Optional[str] = None):
         """终止会话"""
         self.status = SessionStatus.TERMINATED
-        self.updated_at = format_timestamp(get_current_timestamp())
+        self.updated_at = current_timestamp_str()
         
         if reason:
             self.metadata['termination_reason'] = reason
     
+    def mark_expired(self):
+        """标记会话为已过期"""
+        self.status = SessionStatus.EXPIRED
+    
     def set_expires_at(self, expires_at: str):
         """设置过期时间"""
         self.expires_at = expires_at
-        self.updated_at = format_timestamp(get_current_timestamp())
+        self._expires_ts = _iso_to_epoch(expires_at)
+        self.updated_at = current_timestamp_str()
     
     def get_context_value(self, key: str, default: Any = None) -> Any:
         """获取上下文值"""
@@ -410,31 +580,33 @@ class CozeSession:
         if self.context is None:
             self.context = {}
         self.context[key] = value
-        self.updated_at = format_timestamp(get_current_timestamp())
+        self.updated_at = current_timestamp_str()
     
     def clear_context(self):
         """清空上下文"""
         self.context = {}
-        self.updated_at = format_timestamp(get_current_timestamp())
+        self.updated_at = current_timestamp_str()
     
     def get_session_duration(self) -> Optional[float]:
         """获取会话持续时间（秒）"""
         if not self.created_at or not self.last_activity_at:
             return None
         
-        try:
-            created = datetime.fromisoformat(self.created_at.replace('Z', '+00:00'))
-            last_activity = datetime.fromisoformat(self.last_activity_at.replace('Z', '+00:00'))
-            return (last_activity - created).total_seconds()
-        except Exception:
+        if self._created_ts is None:
+            self._created_ts = _iso_to_epoch(self.created_at)
+        if self._last_activity_ts is None:
+            self._last_activity_ts = _iso_to_epoch(self.last_activity_at)
+        
+        if self._created_ts is None or self._last_activity_ts is None:
             return None
+        return self._last_activity_ts - self._created_ts
 
 
-@dataclass
+@dataclass(slots=True, eq=False, repr=False)
 class CozeUser:
     """Coze用户模型"""
     user_id: str
-    active_sessions: List[str] = field(default_factory=list)
+    active_sessions: Set[str] = field(default_factory=set)  # 集合存储，成员判断为O(1)
     total_sessions: int = 0
     total_chats: int = 0
     created_at: Optional[str] = None
@@ -443,17 +615,22 @@ class CozeUser:
     
     def __post_init__(self):
         """初始化后处理"""
-        current_time = format_timestamp(get_current_timestamp())
-        
-        if self.created_at is None:
-            self.created_at = current_time
-        
-        if self.last_activity_at is None:
-            self.last_activity_at = current_time
+        # 仅在需要补全时间戳时才获取当前时间
+        if self.created_at is None or self.last_activity_at is None:
+            current_time = current_timestamp_str()
+            
+            if self.created_at is None:
+                self.created_at = current_time
+            
+            if self.last_activity_at is None:
+                self.last_activity_at = current_time
         
         if self.metadata is None:
             self.metadata = {}
         
+        if not isinstance(self.active_sessions, set):
+            self.active_sessions = set(self.active_sessions)
+        
         # 验证用户ID
         if not validate_user_id(self.user_id):
             raise CozeValidationError(f"Invalid user ID: {self.user_id}")
@@ -462,7 +639,7 @@ class CozeUser:
         """转换为字典"""
         return {
             'user_id': self.user_id,
-            'active_sessions': self.active_sessions,
+            'active_sessions': list(self.active_sessions),
             'total_sessions': self.total_sessions,
             'total_chats': self.total_chats,
             'created_at': self.created_at,
@@ -471,11 +648,29 @@ class CozeUser:
         }
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CozeUser':
-        """从字典创建实例"""
+    def from_dict(cls, data: Dict[str, Any], validate: bool = True) -> 'CozeUser':
+        """从字典创建实例
+        
+        Args:
+            data: 字典数据
+            validate: 是否校验字段，读取Redis中已校验过的数据时可传False，
+                此时跳过 __init__/__post_init__ 直接构建实例
+        """
+        if not validate:
+            return _unchecked_new(
+                cls,
+                user_id=data['user_id'],
+                active_sessions=set(data.get('active_sessions', ())),
+                total_sessions=data.get('total_sessions', 0),
+                total_chats=data.get('total_chats', 0),
+                created_at=data.get('created_at'),
+                last_activity_at=data.get('last_activity_at'),
+                metadata=data.get('metadata') or {}
+            )
+        
         return cls(
             user_id=data['user_id'],
-            active_sessions=data.get('active_sessions', []),
+            active_sessions=set(data.get('active_sessions', ())),
             total_sessions=data.get('total_sessions', 0),
             total_chats=data.get('total_chats', 0),
             created_at=data.get('created_at'),
@@ -485,21 +680,19 @@ class CozeUser:
     
     def add_session(self, session_id: str):
         """添加会话"""
-        if session_id not in self.active_sessions:
-            self.active_sessions.append(session_id)
+        self.active_sessions.add(session_id)
         self.total_sessions += 1
-        self.last_activity_at = format_timestamp(get_current_timestamp())
+        self.last_activity_at = current_timestamp_str()
     
     def remove_session(self, session_id: str):
         """移除会话"""
-        if session_id in self.active_sessions:
-            self.active_sessions.remove(session_id)
-        self.last_activity_at = format_timestamp(get_current_timestamp())
+        self.active_sessions.discard(session_id)
+        self.last_activity_at = current_timestamp_str()
     
     def add_chat(self):
         """增加聊天计数"""
         self.total_chats += 1
-        self.last_activity_at = format_timestamp(get_current_timestamp())
+        self.last_activity_at = current_timestamp_str()
     
     def get_active_session_count(self) -> int:
         """获取活跃会话数量"""
@@ -4,21 +4,166 @@ Coze模块专用Redis客户端（异步版本）
 确保与ai-api原有数据完全隔离
 """
 
+import asyncio
+import functools
+import orjson
+import time
 import redis.asyncio as redis
-import json
-from typing import Optional, Dict, Any, List, Union
-from datetime import datetime, timedelta
+from cachetools import TTLCache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 from .config import get_coze_config
 from .exceptions import CozeRedisError
-from .logging_config import get_coze_logger
-from .utils import safe_json_dumps, safe_json_loads, get_current_timestamp, format_timestamp
+from .logging_config import get_coze_logger, is_log_level_enabled
+from .utils import safe_json_dumps_bytes, safe_json_loads, current_timestamp_str
+
+
+# 会话以Hash存储：每个字段单独JSON序列化，局部更新时只需序列化变化的字段
+
+# 创建会话的Lua脚本：一次往返内原子地写入会话数据、登记活跃会话和用户会话，并可同时写入用户信息
+# KEYS: 会话键, 活跃会话有序集合键, 用户会话集合键, 用户信息键
+# ARGV: 会话过期时间, 会话ID, 集合过期时间, 活跃会话分数（预计过期的epoch秒）, 用户信息JSON（空字符串表示不写入）,
+#       字段1, 值1, 字段2, 值2, ...
+_CREATE_SESSION_LUA = """
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('SADD', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+if ARGV[5] ~= '' then
+    redis.call('SET', KEYS[4], ARGV[5])
+end
+return 1
+"""
+
+# 局部更新会话字段的Lua脚本：会话不存在时不创建残缺的Hash
+# KEYS: 会话键
+# ARGV: 会话过期时间, 字段1, 值1, 字段2, 值2, ...
+# 返回: 1 已更新；0 会话不存在；-1 会话仍为旧版JSON字符串格式
+_UPDATE_SESSION_FIELDS_LUA = """
+local key_type = redis.call('TYPE', KEYS[1])['ok']
+if key_type == 'none' then
+    return 0
+end
+if key_type ~= 'hash' then
+    return -1
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _encode_fields(data: Dict[str, Any]) -> List[Any]:
+    """
+    将字典编码为HSET参数列表（字段名与JSON值交替排列）
+    
+    Args:
+        data: 字段字典
+    
+    Returns:
+        List[Any]: [字段1, 值1, 字段2, 值2, ...]
+    """
+    args: List[Any] = []
+    for field, value in data.items():
+        args.append(field)
+        args.append(safe_json_dumps_bytes(value))
+    return args
+
+
+def _decode_fields(raw: Union[Dict[bytes, bytes], bytes]) -> Dict[str, Any]:
+    """
+    解码会话原始数据
+    
+    Args:
+        raw: HGETALL返回的字段字典，或旧版JSON字符串格式的bytes
+    
+    Returns:
+        Dict[str, Any]: 会话数据
+    """
+    if isinstance(raw, bytes):
+        return safe_json_loads(raw, {})
+    return {field.decode(): safe_json_loads(value) for field, value in raw.items()}
+
+
+def _raw_to_json(raw: Union[Dict[bytes, bytes], bytes]) -> bytes:
+    """
+    将会话原始数据拼接为JSON对象bytes（Hash各字段值本身即为JSON，无需解码再序列化）
+    
+    Args:
+        raw: HGETALL返回的字段字典，或旧版JSON字符串格式的bytes
+    
+    Returns:
+        bytes: 会话数据的JSON bytes
+    """
+    if isinstance(raw, bytes):
+        return raw
+    return b"{" + b",".join(
+        orjson.dumps(field.decode()) + b":" + value for field, value in raw.items()
+    ) + b"}"
+
+
+def _expiry_score(session_data: Dict[str, Any], expire_time: int, now: Optional[float] = None) -> float:
+    """
+    计算会话在活跃会话有序集合中的分数：会话设置的过期时间与键TTL到期时间中较早者
+    
+    Args:
+        session_data: 会话数据
+        expire_time: 会话键的过期时间（秒）
+        now: 当前epoch秒
+    
+    Returns:
+        float: 预计过期的epoch秒
+    """
+    score = (time.time() if now is None else now) + expire_time
+    expires_at_ts = session_data.get('expires_at_ts')
+    if expires_at_ts is not None and expires_at_ts < score:
+        return expires_at_ts
+    return score
+
+
+def _is_wrongtype(error: Exception) -> bool:
+    """判断是否为键类型不匹配错误（旧版JSON字符串格式的会话）"""
+    return isinstance(error, redis.ResponseError) and str(error).startswith("WRONGTYPE")
+
+
+def _redis_op(operation: str, error_message: str, key_args: int = 1, log_key: Optional[str] = None):
+    """
+    Redis操作装饰器：统一记录操作日志，并将异常转换为 CozeRedisError
+    
+    Args:
+        operation: 操作类型（用于日志）
+        error_message: 失败时 CozeRedisError 的消息前缀
+        key_args: 作为日志键的前几个位置参数个数（多个参数以":"连接）
+        log_key: 固定的日志键，指定后不再从参数中提取
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                result = await func(self, *args, **kwargs)
+            except Exception as e:
+                key = log_key if log_key is not None else ":".join(args[:key_args])
+                self._log_operation(operation, key, False, str(e))
+                if log_key is not None:
+                    raise CozeRedisError(f"{error_message}: {e}") from e
+                raise CozeRedisError(f"{error_message} {key}: {e}") from e
+            # 成功日志仅在DEBUG级别启用时才构建日志键
+            if self._debug_enabled:
+                self._log_operation(operation, log_key if log_key is not None else ":".join(args[:key_args]), True)
+            return result
+        return wrapper
+    return decorator
 
 
 class CozeRedisClient:
     """
     Coze专用Redis客户端（异步版本）
     使用独立的命名空间，确保数据隔离
+    
+    各操作方法要求已完成 connect()，请通过 get_coze_redis_client() 获取已连接的实例
     """
     
     def __init__(self, redis_url: str = "redis://localhost:6380/0"):
@@ -30,19 +175,68 @@ class CozeRedisClient:
         """
         self.config = get_coze_config()
         self.logger = get_coze_logger()
+        # 日志级别在启动时确定，缓存DEBUG是否启用，关闭时成功路径不产生任何日志开销
+        self._debug_enabled = is_log_level_enabled("DEBUG")
+        # 预先绑定日志方法，热路径上省去属性查找
+        self._log_debug = self.logger.debug
+        self._log_info = self.logger.info
+        self._log_error = self.logger.error
         self.prefix = self.config.redis_prefix
+        # 默认过期时间缓存为实例属性，避免每次操作经由配置对象查找
+        self._session_expire = int(self.config.session_expire)
+        self._result_expire = int(self.config.result_expire)
+        # 预先拼接各命名空间的键前缀，热路径上只需一次字符串拼接
+        self._session_prefix = self.prefix + "session:"
+        self._chat_prefix = self.prefix + "chat:"
+        self._user_sessions_prefix = self.prefix + "user_sessions:"
+        self._user_prefix = self.prefix + "user:"
+        # 活跃会话以有序集合存储，分数为预计过期的epoch秒，清理时按分数范围取出到期会话
+        self._active_sessions_key = self.prefix + "active_sessions:by_expiry"
+        # 旧版以普通集合存储的活跃会话，清理时迁移到有序集合
+        self._legacy_active_sessions_key = self.prefix + "active_sessions"
         self.redis_url = redis_url
+        self.pool: Optional[redis.BlockingConnectionPool] = None
         self.redis_client: Optional[redis.Redis] = None
+        self._create_session_script = None
+        self._update_session_fields_script = None
+        # 进行中的GET请求（键 -> Future），相同键的并发读取共享同一次Redis往返
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 会话/聊天结果的进程内读缓存（保存Redis原始数据），写入时失效；TTL为0时不启用
+        self._read_cache: Optional[TTLCache] = (
+            TTLCache(maxsize=self.config.read_cache_size, ttl=self.config.read_cache_ttl)
+            if self.config.read_cache_ttl > 0 else None
+        )
+        # 失效计数：读取期间发生过写入时，读到的数据不写入缓存
+        self._read_cache_gen = 0
+        # 统计结果缓存：(生成时间, 统计信息)
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        # 进行中的统计扫描，并发的 get_stats 共享同一次扫描
+        self._stats_future: Optional[asyncio.Future] = None
     
     async def connect(self):
         """连接Redis"""
         try:
-            self.redis_client = await redis.from_url(self.redis_url, decode_responses=True)
+            # 所有请求共享同一个阻塞式连接池，连接数达到上限时等待空闲连接而不是报错
+            # 不启用 decode_responses：JSON数据以bytes直接交给orjson解析，省去一次UTF-8解码
+            # unix:// URL 使用UNIX域套接字连接（同机部署时绕过TCP协议栈），TCP连接额外开启keepalive
+            pool_kwargs = {
+                'max_connections': self.config.redis_max_connections,
+                'socket_connect_timeout': self.config.redis_socket_connect_timeout,
+                'health_check_interval': self.config.redis_health_check_interval,
+                'retry_on_timeout': True,
+            }
+            if not self.redis_url.startswith("unix://"):
+                pool_kwargs['socket_keepalive'] = True
+            self.pool = redis.BlockingConnectionPool.from_url(self.redis_url, **pool_kwargs)
+            self.redis_client = redis.Redis(connection_pool=self.pool)
+            # 注册Lua脚本（通过EVALSHA调用，服务端缺少脚本缓存时自动回退为EVAL）
+            self._create_session_script = self.redis_client.register_script(_CREATE_SESSION_LUA)
+            self._update_session_fields_script = self.redis_client.register_script(_UPDATE_SESSION_FIELDS_LUA)
             # 测试连接
             await self.redis_client.ping()
-            self.logger.info(f"Connected to Redis successfully with prefix: {self.prefix}")
+            self._log_info(f"Connected to Redis successfully with prefix: {self.prefix}")
         except Exception as e:
-            self.logger.error(f"Failed to connect to Redis: {e}")
+            self._log_error(f"Failed to connect to Redis: {e}")
             raise CozeRedisError(f"Redis connection failed: {e}") from e
     
     async def disconnect(self):
@@ -50,6 +244,9 @@ class CozeRedisClient:
         if self.redis_client:
             await self.redis_client.close()
             self.redis_client = None
+        if self.pool:
+            await self.pool.disconnect()
+            self.pool = None
     
     def _get_key(self, key: str) -> str:
         """
@@ -74,15 +271,167 @@ class CozeRedisClient:
             error: 错误信息
         """
         if success:
-            self.logger.debug(f"Redis {operation}: {key}")
+            if self._debug_enabled:
+                self._log_debug("Redis {}: {}", operation, key)
         else:
-            self.logger.error(f"Redis {operation} failed for {key}: {error}")
+            self._log_error("Redis {} failed for {}: {}", operation, key, error)
+    
+    async def _get_shared(self, key: str, fetch: Optional[Callable[[str], Awaitable[Any]]] = None) -> Any:
+        """
+        读取键的原始数据，相同键的并发读取合并为一次Redis往返（singleflight）
+        
+        共享的是Redis返回的原始数据，各调用方各自反序列化，得到互不影响的独立字典
+        
+        Args:
+            key: 完整的Redis键
+            fetch: 读取函数，默认使用GET
+        
+        Returns:
+            Any: 原始数据，不存在时返回None
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future((fetch or self.redis_client.get)(key))
+            self._inflight[key] = future
+            
+            def _done(f: asyncio.Future, key: str = key) -> None:
+                if self._inflight.get(key) is f:
+                    del self._inflight[key]
+            
+            future.add_done_callback(_done)
+        # shield：某个调用方被取消时不影响其他等待同一结果的调用方
+        return await asyncio.shield(future)
+    
+    async def _get_cached(self, key: str, fetch: Optional[Callable[[str], Awaitable[Any]]] = None) -> Any:
+        """
+        经进程内读缓存读取键的原始数据，未命中时通过 _get_shared 合并并发读取
+        
+        Args:
+            key: 完整的Redis键
+            fetch: 读取函数，默认使用GET
+        
+        Returns:
+            Any: 原始数据，不存在时返回None
+        """
+        cache = self._read_cache
+        if cache is None:
+            return await self._get_shared(key, fetch)
+        
+        raw = cache.get(key)
+        if raw is not None:
+            return raw
+        
+        gen = self._read_cache_gen
+        raw = await self._get_shared(key, fetch)
+        # 只缓存存在的数据，且读取期间没有发生写入
+        if raw is not None and gen == self._read_cache_gen:
+            cache[key] = raw
+        return raw
+    
+    def _invalidate(self, *keys: str) -> None:
+        """
+        写入后使读缓存和进行中的共享读取失效，之后的读取会重新访问Redis
+        
+        Args:
+            keys: 完整的Redis键
+        """
+        # 失效计数和进行中的共享读取与读缓存是否启用无关，始终更新；
+        # 进行中的读取可能在写入前发出，移除后之后的读取会重新发起GET
+        self._read_cache_gen += 1
+        cache = self._read_cache
+        for key in keys:
+            self._inflight.pop(key, None)
+            if cache is not None:
+                cache.pop(key, None)
+    
+    async def _read_session_raw(self, key: str) -> Union[Dict[bytes, bytes], bytes, None]:
+        """
+        读取会话原始数据（HGETALL），兼容旧版JSON字符串格式
+        
+        Args:
+            key: 会话键
+        
+        Returns:
+            Union[Dict[bytes, bytes], bytes, None]: Hash字段字典或旧版JSON bytes，不存在时返回None
+        """
+        try:
+            raw = await self.redis_client.hgetall(key)
+        except redis.ResponseError as e:
+            if not _is_wrongtype(e):
+                raise
+            return await self.redis_client.get(key)
+        return raw or None
+    
+    def _queue_session_write(self, pipe, key: str, session_data: Dict[str, Any], expire_time: int) -> None:
+        """
+        在管道中追加整体写入会话的命令（DEL + HSET + EXPIRE，设置了过期时间时追加 ZADD XX LT）
+        
+        先DEL可同时清除旧版JSON字符串格式的数据
+        
+        Args:
+            pipe: Redis管道
+            key: 会话键
+            session_data: 会话数据
+            expire_time: 过期时间（秒）
+        """
+        pipe.delete(key)
+        pipe.hset(key, mapping={field: safe_json_dumps_bytes(value) for field, value in session_data.items()})
+        pipe.expire(key, expire_time)
+        expires_at_ts = session_data.get('expires_at_ts')
+        if expires_at_ts is not None:
+            # 会话设置了过期时间时，提前其在活跃会话有序集合中的检查时间（仅对仍登记的会话生效；LT 需要 Redis >= 6.2）
+            pipe.zadd(self._active_sessions_key, {key[len(self._session_prefix):]: expires_at_ts}, xx=True, lt=True)
+    
+    async def _mget_json(self, key_prefix: str, ids: List[str]) -> Dict[str, Any]:
+        """
+        使用MGET批量读取并反序列化JSON数据（单次往返）
+        
+        Args:
+            key_prefix: 键前缀
+            ids: ID列表
+        
+        Returns:
+            Dict[str, Any]: ID到数据的映射，不存在的ID不包含在结果中
+        """
+        if not ids:
+            return {}
+        values = await self.redis_client.mget([key_prefix + item_id for item_id in ids])
+        return {
+            item_id: safe_json_loads(value, {})
+            for item_id, value in zip(ids, values)
+            if value is not None
+        }
+    
+    async def _setex_many(self, key_prefix: str, items: Dict[str, Dict[str, Any]], expire_time: int) -> bool:
+        """
+        通过非事务管道批量写入JSON数据并设置过期时间（单次往返）
+        
+        Args:
+            key_prefix: 键前缀
+            items: ID到数据的映射
+            expire_time: 过期时间（秒）
+        
+        Returns:
+            bool: 是否全部写入成功
+        """
+        if not items:
+            return True
+        updated_at = current_timestamp_str()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for item_id, data in items.items():
+                # 添加时间戳
+                data['updated_at'] = updated_at
+                pipe.setex(key_prefix + item_id, expire_time, safe_json_dumps_bytes(data))
+            results = await pipe.execute()
+        self._invalidate(*(key_prefix + item_id for item_id in items))
+        return all(results)
     
     # 会话相关操作
     
+    @_redis_op("SET_SESSION", "Failed to set session")
     async def set_session(self, session_id: str, session_data: Dict[str, Any], expire: Optional[int] = None) -> bool:
         """
-        设置会话数据
+        设置会话数据（整体写入Hash）
         
         Args:
             session_id: 会话ID
@@ -92,29 +441,112 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"session:{session_id}")
-            expire_time = expire or self.config.session_expire
-            
-            # 添加时间戳
-            session_data['updated_at'] = format_timestamp(get_current_timestamp())
-            
-            # 序列化数据
-            serialized_data = safe_json_dumps(session_data)
-            
-            # 设置数据和过期时间
-            result = await self.redis_client.setex(key, expire_time, serialized_data)
-            
-            self._log_operation("SET_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("SET_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to set session {session_id}: {e}") from e
+        key = self._session_prefix + session_id
+        expire_time = expire or self._session_expire
+        
+        # 添加时间戳
+        session_data['updated_at'] = current_timestamp_str()
+        
+        # DEL、HSET、EXPIRE在MULTI事务中执行，读取方不会看到半写入的会话
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            self._queue_session_write(pipe, key, session_data, expire_time)
+            await pipe.execute()
+        self._invalidate(key)
+        
+        return True
+    
+    @_redis_op("SET_SESSION_FIELDS", "Failed to set session fields")
+    async def set_session_fields(self, session_id: str, fields: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """
+        局部更新会话字段并刷新过期时间（只序列化变化的字段）
+        
+        Args:
+            session_id: 会话ID
+            fields: 需要更新的字段
+            expire: 过期时间（秒），默认使用配置值
+        
+        Returns:
+            bool: 是否更新成功，会话不存在时返回False
+        """
+        key = self._session_prefix + session_id
+        expire_time = expire or self._session_expire
+        
+        result = await self._update_session_fields_script(keys=[key], args=[expire_time, *_encode_fields(fields)])
+        self._invalidate(key)
+        if result == -1:
+            # 旧版JSON字符串格式：合并字段后整体改写为Hash
+            legacy = await self.redis_client.get(key)
+            if legacy is None:
+                return False
+            session_data = _decode_fields(legacy)
+            session_data.update(fields)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                self._queue_session_write(pipe, key, session_data, expire_time)
+                await pipe.execute()
+            self._invalidate(key)
+            return True
+        return bool(result)
+    
+    async def touch_session(self, session_id: str, expire: Optional[int] = None) -> bool:
+        """
+        刷新会话活动时间并延长过期时间（仅写入两个时间戳字段）
+        
+        Args:
+            session_id: 会话ID
+            expire: 过期时间（秒），默认使用配置值
+        
+        Returns:
+            bool: 是否更新成功，会话不存在时返回False
+        """
+        now = current_timestamp_str()
+        return await self.set_session_fields(
+            session_id, {'last_activity_at': now, 'updated_at': now}, expire
+        )
+    
+    @_redis_op("SET_SESSION_AND_MARK_ACTIVE", "Failed to set session")
+    async def set_session_and_mark_active(self, session_id: str, user_id: str, session_data: Dict[str, Any],
+                                          expire: Optional[int] = None,
+                                          user_data: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        保存会话数据并登记为活跃会话和用户会话（单次往返）
+        
+        通过Lua脚本在服务端原子地执行 HSET、ZADD active_sessions、SADD user_sessions 及对应的 EXPIRE，
+        传入 user_data 时同时写入用户信息（与 set_value(f"user:{user_id}", user_data) 格式一致）
+        
+        Args:
+            session_id: 会话ID
+            user_id: 用户ID
+            session_data: 会话数据
+            expire: 过期时间（秒），默认使用配置值
+            user_data: 用户信息，为None时不写入
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        key = self._session_prefix + session_id
+        expire_time = expire or self._session_expire
+        
+        # 添加时间戳
+        session_data['updated_at'] = current_timestamp_str()
+        
+        result = await self._create_session_script(
+            keys=[
+                key,
+                self._active_sessions_key,
+                self._user_sessions_prefix + user_id,
+                self._user_prefix + user_id
+            ],
+            args=[
+                expire_time, session_id, self._session_expire, _expiry_score(session_data, expire_time),
+                safe_json_dumps_bytes(user_data) if user_data is not None else b"",
+                *_encode_fields(session_data)
+            ]
+        )
+        self._invalidate(key)
+        
+        return bool(result)
     
+    @_redis_op("GET_SESSION", "Failed to get session")
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
         获取会话数据
@@ -125,25 +557,32 @@ class CozeRedisClient:
         Returns:
             Optional[Dict[str, Any]]: 会话数据，不存在时返回None
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"session:{session_id}")
-            data = await self.redis_client.get(key)
-            
-            if data is None:
-                self._log_operation("GET_SESSION", session_id, True)
-                return None
-            
-            session_data = safe_json_loads(str(data), {})
-            self._log_operation("GET_SESSION", session_id, True)
-            return session_data
-            
-        except Exception as e:
-            self._log_operation("GET_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to get session {session_id}: {e}") from e
+        raw = await self._get_cached(self._session_prefix + session_id, self._read_session_raw)
+        
+        if raw is None:
+            return None
+        
+        return _decode_fields(raw)
+    
+    @_redis_op("GET_SESSION_RAW", "Failed to get session")
+    async def get_session_raw(self, session_id: str) -> Optional[bytes]:
+        """
+        获取会话数据的JSON bytes（不反序列化，供直接写入响应体）
+        
+        Args:
+            session_id: 会话ID
+        
+        Returns:
+            Optional[bytes]: 会话数据的JSON bytes，不存在时返回None
+        """
+        raw = await self._get_cached(self._session_prefix + session_id, self._read_session_raw)
+        
+        if raw is None:
+            return None
+        
+        return _raw_to_json(raw)
     
+    @_redis_op("DELETE_SESSION", "Failed to delete session")
     async def delete_session(self, session_id: str) -> bool:
         """
         删除会话数据
@@ -154,20 +593,12 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"session:{session_id}")
-            result = await self.redis_client.delete(key)
-            
-            self._log_operation("DELETE_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("DELETE_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to delete session {session_id}: {e}") from e
+        key = self._session_prefix + session_id
+        deleted = await self.redis_client.delete(key)
+        self._invalidate(key)
+        return bool(deleted)
     
+    @_redis_op("EXISTS_SESSION", "Failed to check session existence")
     async def session_exists(self, session_id: str) -> bool:
         """
         检查会话是否存在
@@ -178,20 +609,10 @@ class CozeRedisClient:
         Returns:
             bool: 会话是否存在
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"session:{session_id}")
-            result = await self.redis_client.exists(key)
-            
-            self._log_operation("EXISTS_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("EXISTS_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to check session existence {session_id}: {e}") from e
+        key = self._session_prefix + session_id
+        return bool(await self.redis_client.exists(key))
     
+    @_redis_op("EXTEND_SESSION", "Failed to extend session")
     async def extend_session(self, session_id: str, expire: Optional[int] = None) -> bool:
         """
         延长会话过期时间
@@ -203,24 +624,107 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"session:{session_id}")
-            expire_time = expire or self.config.session_expire
-            
-            result = await self.redis_client.expire(key, expire_time)
-            
-            self._log_operation("EXTEND_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("EXTEND_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to extend session {session_id}: {e}") from e
+        key = self._session_prefix + session_id
+        expire_time = expire or self._session_expire
+        return bool(await self.redis_client.expire(key, expire_time))
+    
+    @_redis_op("GET_SESSIONS", "Failed to get sessions", log_key="batch")
+    async def get_sessions(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取会话数据（管道单次往返）
+        
+        Args:
+            session_ids: 会话ID列表
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: 会话ID到会话数据的映射，不存在的会话不包含在结果中
+        """
+        if not session_ids:
+            return {}
+        
+        prefix = self._session_prefix
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hgetall(prefix + session_id)
+            results = await pipe.execute(raise_on_error=False)
+        
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for session_id, raw in zip(session_ids, results):
+            if isinstance(raw, Exception):
+                if not _is_wrongtype(raw):
+                    raise raw
+                # 旧版JSON字符串格式的会话单独读取
+                raw = await self.redis_client.get(prefix + session_id)
+            if raw:
+                sessions[session_id] = _decode_fields(raw)
+        return sessions
+    
+    @_redis_op("EXPIRE_SESSIONS", "Failed to expire sessions", log_key="batch")
+    async def expire_sessions(self, expired: Dict[str, Dict[str, Any]], stale_ids: List[str],
+                              rescheduled: Optional[Dict[str, float]] = None) -> bool:
+        """
+        批量写回过期会话并解除活跃/用户会话登记（MULTI事务单次往返）
+        
+        Args:
+            expired: 已标记为过期的会话ID到会话数据的映射
+            stale_ids: 数据已不存在、只需从活跃会话集合中移除的会话ID
+            rescheduled: 尚未过期（期间被续期）的会话ID到新分数的映射，仅更新仍在集合中的成员
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        if not expired and not stale_ids and not rescheduled:
+            return True
+        
+        updated_at = current_timestamp_str()
+        keys = [self._session_prefix + session_id for session_id in expired]
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for key, (session_id, session_data) in zip(keys, expired.items()):
+                # 添加时间戳
+                session_data['updated_at'] = updated_at
+                self._queue_session_write(pipe, key, session_data, self._session_expire)
+                user_id = session_data.get('user_id')
+                if user_id:
+                    pipe.srem(self._user_sessions_prefix + user_id, session_id)
+            removed = [*expired, *stale_ids]
+            if removed:
+                pipe.zrem(self._active_sessions_key, *removed)
+            if rescheduled:
+                pipe.zadd(self._active_sessions_key, rescheduled, xx=True)
+            await pipe.execute()
+        self._invalidate(*keys)
+        return True
+    
+    @_redis_op("SET_SESSIONS", "Failed to set sessions", log_key="batch")
+    async def set_sessions(self, sessions: Dict[str, Dict[str, Any]], expire: Optional[int] = None) -> bool:
+        """
+        批量设置会话数据（管道单次往返）
+        
+        Args:
+            sessions: 会话ID到会话数据的映射
+            expire: 过期时间（秒），默认使用配置值
+        
+        Returns:
+            bool: 是否全部设置成功
+        """
+        if not sessions:
+            return True
+        
+        expire_time = expire or self._session_expire
+        updated_at = current_timestamp_str()
+        keys = [self._session_prefix + session_id for session_id in sessions]
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for key, session_data in zip(keys, sessions.values()):
+                # 添加时间戳
+                session_data['updated_at'] = updated_at
+                self._queue_session_write(pipe, key, session_data, expire_time)
+            await pipe.execute()
+        self._invalidate(*keys)
+        return True
     
     # 聊天结果相关操作
     
+    @_redis_op("SET_CHAT_RESULT", "Failed to set chat result")
     async def set_chat_result(self, chat_id: str, result_data: Dict[str, Any], expire: Optional[int] = None) -> bool:
         """
         设置聊天结果数据
@@ -233,29 +737,53 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"chat:{chat_id}")
-            expire_time = expire or self.config.result_expire
-            
-            # 添加时间戳
-            result_data['updated_at'] = format_timestamp(get_current_timestamp())
-            
-            # 序列化数据
-            serialized_data = safe_json_dumps(result_data)
-            
-            # 设置数据和过期时间
-            result = await self.redis_client.setex(key, expire_time, serialized_data)
-            
-            self._log_operation("SET_CHAT_RESULT", chat_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("SET_CHAT_RESULT", chat_id, False, str(e))
-            raise CozeRedisError(f"Failed to set chat result {chat_id}: {e}") from e
+        key = self._chat_prefix + chat_id
+        expire_time = expire or self._result_expire
+        
+        # 添加时间戳
+        result_data['updated_at'] = current_timestamp_str()
+        
+        # 序列化数据
+        serialized_data = safe_json_dumps_bytes(result_data)
+        
+        # 设置数据和过期时间
+        result = await self.redis_client.setex(key, expire_time, serialized_data)
+        self._invalidate(key)
+        
+        return bool(result)
     
+    @_redis_op("SAVE_CHAT_AND_SESSION", "Failed to save chat and session")
+    async def save_chat_and_session(self, chat_id: str, chat_data: Dict[str, Any],
+                                    session_id: str, session_data: Dict[str, Any]) -> bool:
+        """
+        在同一个MULTI事务中保存聊天结果和会话数据（单次往返）
+        
+        Args:
+            chat_id: 聊天ID
+            chat_data: 聊天结果数据
+            session_id: 会话ID
+            session_data: 会话数据
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        chat_key = self._chat_prefix + chat_id
+        session_key = self._session_prefix + session_id
+        
+        # 添加时间戳
+        updated_at = current_timestamp_str()
+        chat_data['updated_at'] = updated_at
+        session_data['updated_at'] = updated_at
+        
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.setex(chat_key, self._result_expire, safe_json_dumps_bytes(chat_data))
+            self._queue_session_write(pipe, session_key, session_data, self._session_expire)
+            await pipe.execute()
+        self._invalidate(chat_key, session_key)
+        
+        return True
+    
+    @_redis_op("GET_CHAT_RESULT", "Failed to get chat result")
     async def get_chat_result(self, chat_id: str) -> Optional[Dict[str, Any]]:
         """
         获取聊天结果数据
@@ -266,25 +794,15 @@ class CozeRedisClient:
         Returns:
             Optional[Dict[str, Any]]: 结果数据，不存在时返回None
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"chat:{chat_id}")
-            data = await self.redis_client.get(key)
-            
-            if data is None:
-                self._log_operation("GET_CHAT_RESULT", chat_id, True)
-                return None
-            
-            result_data = safe_json_loads(str(data), {})
-            self._log_operation("GET_CHAT_RESULT", chat_id, True)
-            return result_data
-            
-        except Exception as e:
-            self._log_operation("GET_CHAT_RESULT", chat_id, False, str(e))
-            raise CozeRedisError(f"Failed to get chat result {chat_id}: {e}") from e
+        data = await self._get_cached(self._chat_prefix + chat_id)
+        
+        if data is None:
+            return None
+        
+        result_data = safe_json_loads(data, {})
+        return result_data
     
+    @_redis_op("DELETE_CHAT_RESULT", "Failed to delete chat result")
     async def delete_chat_result(self, chat_id: str) -> bool:
         """
         删除聊天结果数据
@@ -295,22 +813,41 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"chat:{chat_id}")
-            result = await self.redis_client.delete(key)
-            
-            self._log_operation("DELETE_CHAT_RESULT", chat_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("DELETE_CHAT_RESULT", chat_id, False, str(e))
-            raise CozeRedisError(f"Failed to delete chat result {chat_id}: {e}") from e
+        key = self._chat_prefix + chat_id
+        deleted = await self.redis_client.delete(key)
+        self._invalidate(key)
+        return bool(deleted)
+    
+    @_redis_op("GET_CHAT_RESULTS", "Failed to get chat results", log_key="batch")
+    async def get_chat_results(self, chat_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取聊天结果数据（MGET单次往返）
+        
+        Args:
+            chat_ids: 聊天ID列表
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: 聊天ID到结果数据的映射，不存在的结果不包含在结果中
+        """
+        return await self._mget_json(self._chat_prefix, chat_ids)
+    
+    @_redis_op("SET_CHAT_RESULTS", "Failed to set chat results", log_key="batch")
+    async def set_chat_results(self, results: Dict[str, Dict[str, Any]], expire: Optional[int] = None) -> bool:
+        """
+        批量设置聊天结果数据（管道单次往返）
+        
+        Args:
+            results: 聊天ID到结果数据的映射
+            expire: 过期时间（秒），默认使用配置值
+        
+        Returns:
+            bool: 是否全部设置成功
+        """
+        return await self._setex_many(self._chat_prefix, results, expire or self._result_expire)
     
     # 用户会话管理
     
+    @_redis_op("ADD_USER_SESSION", "Failed to add user session", key_args=2)
     async def add_user_session(self, user_id: str, session_id: str) -> bool:
         """
         添加用户会话关联
@@ -322,23 +859,17 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"user_sessions:{user_id}")
-            result = await self.redis_client.sadd(key, session_id)
-            
-            # 设置过期时间
-            await self.redis_client.expire(key, self.config.session_expire)
-            
-            self._log_operation("ADD_USER_SESSION", f"{user_id}:{session_id}", True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("ADD_USER_SESSION", f"{user_id}:{session_id}", False, str(e))
-            raise CozeRedisError(f"Failed to add user session {user_id}:{session_id}: {e}") from e
+        key = self._user_sessions_prefix + user_id
+        
+        # SADD和EXPIRE通过管道在一次往返内完成
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, session_id)
+            pipe.expire(key, self._session_expire)
+            result, _ = await pipe.execute()
+        
+        return bool(result)
     
+    @_redis_op("GET_USER_SESSIONS", "Failed to get user sessions")
     async def get_user_sessions(self, user_id: str) -> List[str]:
         """
         获取用户的所有会话
@@ -349,22 +880,10 @@ class CozeRedisClient:
         Returns:
             List[str]: 会话ID列表
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"user_sessions:{user_id}")
-            sessions_set = await self.redis_client.smembers(key)
-            
-            self._log_operation("GET_USER_SESSIONS", user_id, True)
-            if isinstance(sessions_set, set):
-                return list(sessions_set)
-            return []
-            
-        except Exception as e:
-            self._log_operation("GET_USER_SESSIONS", user_id, False, str(e))
-            raise CozeRedisError(f"Failed to get user sessions {user_id}: {e}") from e
+        # SMEMBERS 始终返回set（键不存在时为空集合），无需类型检查
+        return [member.decode() for member in await self.redis_client.smembers(self._user_sessions_prefix + user_id)]
     
+    @_redis_op("REMOVE_USER_SESSION", "Failed to remove user session", key_args=2)
     async def remove_user_session(self, user_id: str, session_id: str) -> bool:
         """
         移除用户会话关联
@@ -376,22 +895,12 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key(f"user_sessions:{user_id}")
-            result = await self.redis_client.srem(key, session_id)
-            
-            self._log_operation("REMOVE_USER_SESSION", f"{user_id}:{session_id}", True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("REMOVE_USER_SESSION", f"{user_id}:{session_id}", False, str(e))
-            raise CozeRedisError(f"Failed to remove user session {user_id}:{session_id}: {e}") from e
+        key = self._user_sessions_prefix + user_id
+        return bool(await self.redis_client.srem(key, session_id))
     
     # 活跃会话管理
     
+    @_redis_op("ADD_ACTIVE_SESSION", "Failed to add active session")
     async def add_active_session(self, session_id: str) -> bool:
         """
         添加活跃会话
@@ -402,23 +911,17 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key("active_sessions")
-            result = await self.redis_client.sadd(key, session_id)
-            
-            # 设置过期时间
-            await self.redis_client.expire(key, self.config.session_expire)
-            
-            self._log_operation("ADD_ACTIVE_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("ADD_ACTIVE_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to add active session {session_id}: {e}") from e
+        key = self._active_sessions_key
+        
+        # ZADD和EXPIRE通过管道在一次往返内完成
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {session_id: time.time() + self._session_expire})
+            pipe.expire(key, self._session_expire)
+            result, _ = await pipe.execute()
+        
+        return bool(result)
     
+    @_redis_op("REMOVE_ACTIVE_SESSION", "Failed to remove active session")
     async def remove_active_session(self, session_id: str) -> bool:
         """
         移除活跃会话
@@ -429,20 +932,10 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key("active_sessions")
-            result = await self.redis_client.srem(key, session_id)
-            
-            self._log_operation("REMOVE_ACTIVE_SESSION", session_id, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("REMOVE_ACTIVE_SESSION", session_id, False, str(e))
-            raise CozeRedisError(f"Failed to remove active session {session_id}: {e}") from e
+        key = self._active_sessions_key
+        return bool(await self.redis_client.zrem(key, session_id))
     
+    @_redis_op("GET_ACTIVE_SESSIONS", "Failed to get active sessions", log_key="all")
     async def get_active_sessions(self) -> List[str]:
         """
         获取所有活跃会话
@@ -450,24 +943,53 @@ class CozeRedisClient:
         Returns:
             List[str]: 活跃会话ID列表
         """
+        return [member.decode() for member in await self.redis_client.zrange(self._active_sessions_key, 0, -1)]
+    
+    @_redis_op("GET_DUE_ACTIVE_SESSIONS", "Failed to get due active sessions", log_key="all")
+    async def get_due_active_sessions(self, now: Optional[float] = None) -> List[str]:
+        """
+        获取预计已到期的活跃会话（ZRANGEBYSCORE，只返回需要检查的会话）
+        
+        Args:
+            now: 当前epoch秒，默认取当前时间
+        
+        Returns:
+            List[str]: 分数不大于当前时间的活跃会话ID列表
+        """
+        members = await self.redis_client.zrangebyscore(
+            self._active_sessions_key, "-inf", time.time() if now is None else now
+        )
+        return [member.decode() for member in members]
+    
+    @_redis_op("MIGRATE_ACTIVE_SESSIONS", "Failed to migrate active sessions", log_key="all")
+    async def migrate_legacy_active_sessions(self) -> int:
+        """
+        将旧版普通集合中的活跃会话迁移到有序集合（分数为当前时间，下次清理时逐个核对）
+        
+        Returns:
+            int: 迁移的会话数量
+        """
+        legacy_key = self._legacy_active_sessions_key
         try:
-            if not self.redis_client:
-                await self.connect()
-            
-            key = self._get_key("active_sessions")
-            sessions_set = await self.redis_client.smembers(key)
-            
-            self._log_operation("GET_ACTIVE_SESSIONS", "all", True)
-            if isinstance(sessions_set, set):
-                return list(sessions_set)
-            return []
-            
-        except Exception as e:
-            self._log_operation("GET_ACTIVE_SESSIONS", "all", False, str(e))
-            raise CozeRedisError(f"Failed to get active sessions: {e}") from e
+            members = await self.redis_client.smembers(legacy_key)
+        except redis.ResponseError as e:
+            if not _is_wrongtype(e):
+                raise
+            return 0
+        if not members:
+            return 0
+        
+        now = time.time()
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._active_sessions_key, dict.fromkeys(members, now), nx=True)
+            pipe.expire(self._active_sessions_key, self._session_expire)
+            pipe.delete(legacy_key)
+            await pipe.execute()
+        return len(members)
     
     # 通用操作
     
+    @_redis_op("SET_VALUE", "Failed to set value")
     async def set_value(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """
         设置键值对
@@ -480,25 +1002,17 @@ class CozeRedisClient:
         Returns:
             bool: 操作是否成功
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            redis_key = self._get_key(key)
-            serialized_value = safe_json_dumps(value)
-            
-            if expire:
-                result = await self.redis_client.setex(redis_key, expire, serialized_value)
-            else:
-                result = await self.redis_client.set(redis_key, serialized_value)
-            
-            self._log_operation("SET_VALUE", key, True)
-            return bool(result)
-            
-        except Exception as e:
-            self._log_operation("SET_VALUE", key, False, str(e))
-            raise CozeRedisError(f"Failed to set value {key}: {e}") from e
+        redis_key = self._get_key(key)
+        serialized_value = safe_json_dumps_bytes(value)
+        
+        if expire:
+            result = await self.redis_client.setex(redis_key, expire, serialized_value)
+        else:
+            result = await self.redis_client.set(redis_key, serialized_value)
+        
+        return bool(result)
     
+    @_redis_op("GET_VALUE", "Failed to get value")
     async def get_value(self, key: str, default: Any = None) -> Any:
         """
         获取键值
@@ -510,63 +1024,95 @@ class CozeRedisClient:
         Returns:
             Any: 键值
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            redis_key = self._get_key(key)
-            data = await self.redis_client.get(redis_key)
-            
-            if data is None:
-                self._log_operation("GET_VALUE", key, True)
-                return default
-            
-            value = safe_json_loads(str(data), default)
-            self._log_operation("GET_VALUE", key, True)
-            return value
-            
-        except Exception as e:
-            self._log_operation("GET_VALUE", key, False, str(e))
-            raise CozeRedisError(f"Failed to get value {key}: {e}") from e
+        redis_key = self._get_key(key)
+        data = await self.redis_client.get(redis_key)
+        
+        if data is None:
+            return default
+        
+        value = safe_json_loads(data, default)
+        return value
+    
+    async def _count_keys(self, pattern: str) -> int:
+        """
+        使用SCAN增量统计匹配模式的键数量
+        
+        Args:
+            pattern: 键匹配模式
+        
+        Returns:
+            int: 匹配的键数量
+        """
+        count = 0
+        async for _ in self.redis_client.scan_iter(match=pattern, count=1000):
+            count += 1
+        return count
+    
+    async def _collect_stats(self) -> Dict[str, Any]:
+        """
+        扫描键空间统计各类键数量
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        # 各类键通过SCAN并发增量计数，不使用阻塞的KEYS命令，也不把全部键拉到客户端
+        total, session_keys, chat_keys, user_session_keys, active_session_keys = await asyncio.gather(
+            self._count_keys(self._get_key("*")),
+            self._count_keys(self._get_key("session:*")),
+            self._count_keys(self._get_key("chat:*")),
+            self._count_keys(self._get_key("user_sessions:*")),
+            self._count_keys(self._get_key("active_sessions*")),
+        )
+        stats = {
+            'total_keys': total,
+            'session_keys': session_keys,
+            'chat_keys': chat_keys,
+            'user_session_keys': user_session_keys,
+            'active_session_keys': active_session_keys,
+            'other_keys': total - session_keys - chat_keys - user_session_keys - active_session_keys,
+            'prefix': self.prefix
+        }
+        self._stats_cache = (time.monotonic(), stats)
+        
+        self._log_info("Coze Redis stats: {}", stats)
+        return stats
     
     async def get_stats(self) -> Dict[str, Any]:
         """
         获取Coze Redis使用统计
         
+        结果在 stats_cache_ttl 秒内复用，并发请求合并为一次扫描，监控轮询不会反复遍历键空间
+        
         Returns:
             Dict[str, Any]: 统计信息
         """
-        try:
-            if not self.redis_client:
-                await self.connect()
-            
-            pattern = self._get_key("*")
-            keys_result = await self.redis_client.keys(pattern)
+        cached = self._stats_cache
+        if cached is not None and time.monotonic() - cached[0] < self.config.stats_cache_ttl:
+            return dict(cached[1])
+        
+        future = self._stats_future
+        if future is None:
+            future = asyncio.ensure_future(self._collect_stats())
+            self._stats_future = future
             
-            if isinstance(keys_result, list):
-                all_keys_list = keys_result
-            else:
-                all_keys_list = []
-            stats = {
-                'total_keys': len(all_keys_list),
-                'session_keys': len([k for k in all_keys_list if ':session:' in k]),
-                'chat_keys': len([k for k in all_keys_list if ':chat:' in k]),
-                'user_session_keys': len([k for k in all_keys_list if ':user_sessions:' in k]),
-                'active_session_keys': len([k for k in all_keys_list if ':active_sessions' in k]),
-                'other_keys': len([k for k in all_keys_list if not any(x in k for x in [':session:', ':chat:', ':user_sessions:', ':active_sessions'])]),
-                'prefix': self.prefix
-            }
+            def _done(f: asyncio.Future) -> None:
+                if self._stats_future is f:
+                    self._stats_future = None
             
-            self.logger.info(f"Coze Redis stats: {stats}")
-            return stats
+            future.add_done_callback(_done)
+        
+        try:
+            return dict(await asyncio.shield(future))
             
         except Exception as e:
-            self.logger.error(f"Failed to get Coze Redis stats: {e}")
+            self._log_error(f"Failed to get Coze Redis stats: {e}")
             raise CozeRedisError(f"Failed to get stats: {e}") from e
 
 
 # 全局Redis客户端实例
 _redis_client: Optional[CozeRedisClient] = None
+# 串行化首次创建连接，避免冷启动时并发请求各自创建并泄漏多余的客户端
+_redis_client_lock = asyncio.Lock()
 
 
 async def get_coze_redis_client(redis_url: Optional[str] = None) -> CozeRedisClient:
@@ -580,11 +1126,28 @@ async def get_coze_redis_client(redis_url: Optional[str] = None) -> CozeRedisCli
         CozeRedisClient: Redis客户端实例
     """
     global _redis_client
-    if redis_url is None:
-        redis_url = get_coze_config().redis_url
     if _redis_client is None:
-        _redis_client = CozeRedisClient(redis_url)
-        await _redis_client.connect()
+        async with _redis_client_lock:
+            # 获取锁后再次检查，等待期间可能已由其他协程完成创建
+            if _redis_client is None:
+                if redis_url is None:
+                    redis_url = get_coze_config().redis_url
+                # 连接成功后才发布为单例，保证返回的实例一定已连接
+                client = CozeRedisClient(redis_url)
+                await client.connect()
+                _redis_client = client
+    return _redis_client
+
+
+def peek_coze_redis_client() -> Optional[CozeRedisClient]:
+    """
+    获取已创建的Coze Redis客户端实例（不创建新实例）
+    
+    应用启动后单例已就绪，请求热路径上直接读取，省去一次协程调用
+    
+    Returns:
+        Optional[CozeRedisClient]: 已连接的客户端实例，尚未创建时返回None
+    """
     return _redis_client
 
 
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Coze模块响应类
+使用 orjson 序列化JSON响应
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    基于 orjson 的JSON响应
+
+    orjson 直接输出UTF-8 bytes，序列化速度明显快于标准库json。
+    （FastAPI 自带的同名类已标记为弃用，这里提供等价实现）
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -5,18 +5,20 @@ Coze模块异步任务处理
 """
 
 import time
+import random
 import asyncio
+import hashlib
+import orjson
 import httpx
 import os
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple
 
 from .config import get_coze_config
-from .logging_config import get_coze_logger
+from .logging_config import get_coze_logger, is_log_level_enabled
 from .redis_client import get_coze_redis_client
+from .http_clients import get_coze_http_client
 from .models import (
-    CozeSession, CozeChat, CozeMessage, CozeUser,
-    SessionStatus, ChatStatus, MessageRole,
+    CozeSession, CozeChat, CozeUser, ChatStatus,
     create_coze_session, create_coze_chat
 )
 from .exceptions import (
@@ -24,8 +26,7 @@ from .exceptions import (
     CozeSessionError, CozeValidationError,
 )
 from .utils import (
-    get_current_timestamp,
-    safe_json_loads, safe_json_dumps,
+    safe_json_loads,
     create_response_dict
 )
 
@@ -33,6 +34,57 @@ from .utils import (
 config = get_coze_config()
 logger = get_coze_logger()
 
+# DEBUG日志是否启用（启动时确定），关闭时逐条消息的日志不产生格式化开销
+_DEBUG_ENABLED = is_log_level_enabled("DEBUG")
+
+# assistant消息类型到解析结果字段的映射
+_MESSAGE_TYPE_FIELDS = {
+    'answer': 'content',
+    'verbose': 'reasoning_content',
+}
+
+# 进行中的消息发送（会话ID:幂等键:消息内容与元数据摘要 -> Future），携带相同幂等键的并发重复请求共享同一次处理
+_inflight_messages: Dict[str, asyncio.Future] = {}
+
+# 清理过期会话时每批处理的会话数
+_CLEANUP_BATCH_SIZE = 500
+
+# 聊天结果轮询：指数退避参数（秒）、最长等待时间（秒）及最大轮询次数
+_POLL_INITIAL_DELAY = 0.25
+_POLL_BACKOFF = 1.5
+_POLL_MAX_DELAY = 3.0
+_POLL_JITTER = 0.1
+_POLL_TIMEOUT = 60
+_POLL_MAX_ATTEMPTS = 60
+
+
+def _poll_delay(attempt: int) -> float:
+    """
+    计算第 attempt 次轮询后的等待时间（指数退避加随机抖动）
+    
+    Args:
+        attempt: 轮询次数（从0开始）
+        
+    Returns:
+        等待时间（秒）
+    """
+    return min(_POLL_MAX_DELAY, _POLL_INITIAL_DELAY * _POLL_BACKOFF ** attempt) + random.uniform(0, _POLL_JITTER)
+
+
+def _load_user(user_data: Any) -> Dict[str, Any]:
+    """
+    解析用户记录（get_value 已完成反序列化；兼容旧版以JSON字符串二次编码存储的记录）
+    
+    Args:
+        user_data: get_value 返回的用户记录
+        
+    Returns:
+        用户数据字典
+    """
+    if isinstance(user_data, dict):
+        return user_data
+    return safe_json_loads(user_data, {}) or {}
+
 
 # ==================== 会话管理任务 ====================
 
@@ -63,30 +115,29 @@ async def create_session_task(user_id: str, context: Optional[Dict[str, Any]] =
             metadata=metadata or {}
         )
         
-        # 保存到Redis
+        # 读取并更新用户信息
         redis_client = await get_coze_redis_client()
-        await redis_client.set_session(session.session_id, session.to_dict())
-        
-        # 更新用户信息
         user_data = await redis_client.get_value(f"user:{user_id}")
         if user_data:
-            user = CozeUser.from_dict(safe_json_loads(user_data, {}))
+            user = CozeUser.from_dict(_load_user(user_data), validate=False)
         else:
             from .models import create_coze_user
             user = create_coze_user(user_id)
         
         user.add_session(session.session_id)
-        await redis_client.set_value(f"user:{user_id}", safe_json_dumps(user.to_dict()))
         
-        # 添加到活跃会话
-        await redis_client.add_active_session(session.session_id)
-        await redis_client.add_user_session(user_id, session.session_id)
+        # 保存会话和用户信息，并同时登记为活跃会话和用户会话（单次往返）
+        # 会话字典只构建一次，保存与响应共用
+        session_dict = session.to_dict()
+        await redis_client.set_session_and_mark_active(
+            session.session_id, user_id, session_dict, user_data=user.to_dict()
+        )
         
         logger.info(f"Session created successfully: {session.session_id}")
         
         return create_response_dict(
             success=True,
-            data=session.to_dict(),
+            data=session_dict,
             message="Session created successfully"
         )
         
@@ -114,21 +165,24 @@ async def get_session_task(session_id: str) -> Dict[str, Any]:
         if not session_data:
             raise CozeSessionError(f"Session not found: {session_id}")
         
-        session = CozeSession.from_dict(session_data)
+        session = CozeSession.from_dict(session_data, validate=False)
         
         # 检查会话是否过期
-        if session.expires_at:
-            expires_timestamp = datetime.fromisoformat(session.expires_at.replace('Z', '+00:00')).timestamp()
-            if time.time() > expires_timestamp:
-                session.status = SessionStatus.EXPIRED
-                await redis_client.set_session(session_id, session.to_dict())
-                logger.warning(f"Session {session_id} has expired")
+        expired = session.is_past_expiry()
+        if expired:
+            session.mark_expired()
+        
+        # 会话字典只构建一次，保存与响应共用
+        session_dict = session.to_dict()
+        if expired:
+            await redis_client.set_session(session_id, session_dict)
+            logger.warning(f"Session {session_id} has expired")
         
         logger.info(f"Session retrieved successfully: {session_id}")
         
         return create_response_dict(
             success=True,
-            data=session.to_dict(),
+            data=session_dict,
             message="Session retrieved successfully"
         )
         
@@ -153,18 +207,10 @@ async def update_session_activity_task(session_id: str) -> Dict[str, Any]:
         logger.info(f"Updating session activity: {session_id}")
         
         redis_client = await get_coze_redis_client()
-        session_data = await redis_client.get_session(session_id)
-        if not session_data:
-            raise CozeSessionError(f"Session not found: {session_id}")
-        
-        session = CozeSession.from_dict(session_data)
-        session.update_activity()
-        
-        # 保存更新后的会话
-        await redis_client.set_session(session_id, session.to_dict())
         
-        # 延长会话过期时间
-        await redis_client.extend_session(session_id, getattr(config, 'session_expire', 3600))
+        # 只更新活动时间字段并延长过期时间，无需读取和重写整个会话
+        if not await redis_client.touch_session(session_id):
+            raise CozeSessionError(f"Session not found: {session_id}")
         
         logger.info(f"Session activity updated: {session_id}")
         
@@ -199,7 +245,7 @@ async def terminate_session_task(session_id: str, reason: str = "User requested"
         if not session_data:
             raise CozeSessionError(f"Session not found: {session_id}")
         
-        session = CozeSession.from_dict(session_data)
+        session = CozeSession.from_dict(session_data, validate=False)
         session.terminate(reason)
         
         # 保存更新后的会话
@@ -226,10 +272,51 @@ async def terminate_session_task(session_id: str, reason: str = "User requested"
 # ==================== 消息处理任务 ====================
 
 async def send_message_task(session_id: str, message_content: str, 
-                           metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                           metadata: Optional[Dict[str, Any]] = None,
+                           idempotency_key: Optional[str] = None) -> Dict[str, Any]:
     """
     发送消息到Coze API（异步）
     
+    仅当调用方提供 idempotency_key 时才合并重复请求：同一会话中幂等键、消息内容和元数据（含stream）
+    均相同且仍在处理中的请求共享首个请求的结果（singleflight），不重复调用Coze API。
+    处理完成后不再保留结果，之后相同的请求会正常创建新的聊天；未提供幂等键时每次调用都单独处理
+    
+    Args:
+        session_id: 会话ID
+        message_content: 消息内容
+        metadata: 消息元数据
+        idempotency_key: 幂等键（如请求头 Idempotency-Key），为None时不合并
+        
+    Returns:
+        包含聊天结果的字典
+    """
+    if idempotency_key is None:
+        return await _send_message(session_id, message_content, metadata)
+    
+    digest = hashlib.blake2b(message_content.encode(), digest_size=8)
+    digest.update(orjson.dumps(metadata or {}, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str))
+    key = f"{session_id}:{idempotency_key}:{digest.hexdigest()}"
+    future = _inflight_messages.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_send_message(session_id, message_content, metadata))
+        _inflight_messages[key] = future
+        
+        def _done(f: asyncio.Future, key: str = key) -> None:
+            if _inflight_messages.get(key) is f:
+                del _inflight_messages[key]
+        
+        future.add_done_callback(_done)
+    else:
+        logger.info("Joining in-flight message for session: {}", session_id)
+    # shield：某个调用方被取消时不影响其他等待同一结果的调用方
+    return await asyncio.shield(future)
+
+
+async def _send_message(session_id: str, message_content: str, 
+                        metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    发送消息到Coze API的实际处理逻辑
+    
     Args:
         session_id: 会话ID
         message_content: 消息内容
@@ -247,7 +334,7 @@ async def send_message_task(session_id: str, message_content: str,
         if not session_data:
             raise CozeSessionError(f"Session not found: {session_id}")
         
-        session = CozeSession.from_dict(session_data)
+        session = CozeSession.from_dict(session_data, validate=False)
         if not session.is_active():
             raise CozeSessionError(f"Session is not active: {session_id}")
         
@@ -269,18 +356,13 @@ async def send_message_task(session_id: str, message_content: str,
         
         # 调用Coze API
         try:
-            api_response = await call_coze_api(
+            # call_coze_api 直接在聊天对象上设置API结果，随后与会话一并保存，无需重新读取
+            api_response, chat = await call_coze_api(
                 user_message_content=message_content,
                 session_context=session.context or {},
-                chat_id=chat.chat_id
+                chat=chat
             )
             
-            # API响应已经通过call_coze_api中的set_api_result设置了完整数据
-            # 这里只需要重新加载更新后的聊天数据
-            updated_chat_data = await redis_client.get_chat_result(chat.chat_id)
-            if updated_chat_data:
-                chat = CozeChat.from_dict(updated_chat_data)
-            
             logger.info(f"Message processed successfully for chat: {chat.chat_id}")
             
         except Exception as api_error:
@@ -296,24 +378,27 @@ async def send_message_task(session_id: str, message_content: str,
             
             raise CozeAPIError(f"API call failed: {str(api_error)}")
         
-        # 保存更新后的聊天记录
-        await redis_client.set_chat_result(chat.chat_id, chat.to_dict())
-        
-        # 添加到会话历史
+        # 添加到会话历史（add_chat 同时刷新活动时间）
         session.add_chat(chat)
-        session.update_activity()
-        await redis_client.set_session(session_id, session.to_dict())
+        
+        # 聊天记录和会话在同一事务中保存，同时并发读取用户信息，合并为一次往返的等待
+        # 聊天字典只构建一次，保存与响应共用
+        chat_dict = chat.to_dict()
+        user_key = f"user:{session.user_id}"
+        _, user_data = await asyncio.gather(
+            redis_client.save_chat_and_session(chat.chat_id, chat_dict, session_id, session.to_dict()),
+            redis_client.get_value(user_key)
+        )
         
         # 更新用户聊天计数
-        user_data = await redis_client.get_value(f"user:{session.user_id}")
         if user_data:
-            user = CozeUser.from_dict(safe_json_loads(user_data, {}))
+            user = CozeUser.from_dict(_load_user(user_data), validate=False)
             user.add_chat()
-            await redis_client.set_value(f"user:{session.user_id}", safe_json_dumps(user.to_dict()))
+            await redis_client.set_value(user_key, user.to_dict())
         
         return create_response_dict(
             success=True,
-            data=chat.to_dict(),
+            data=chat_dict,
             message="Message sent successfully"
         )
         
@@ -342,9 +427,9 @@ async def get_chat_result_task(chat_id: str) -> Dict[str, Any]:
         if not chat_data:
             raise CozeValidationError(f"Chat not found: {chat_id}")
         
-        chat = CozeChat.from_dict(chat_data)
+        chat = CozeChat.from_dict(chat_data, validate=False)
         
-        logger.info(f"Chat result retrieved: {chat_id}, status: {chat.status.value}")
+        logger.info(f"Chat result retrieved: {chat_id}, status: {chat.status}")
         
         return create_response_dict(
             success=True,
@@ -360,29 +445,25 @@ async def get_chat_result_task(chat_id: str) -> Dict[str, Any]:
 # ==================== API调用任务 ====================
 
 async def call_coze_api(user_message_content: str, session_context: Dict[str, Any], 
-                       chat_id: str) -> Dict[str, Any]:
+                       chat: CozeChat) -> Tuple[Dict[str, Any], CozeChat]:
     """
     调用Coze API（异步）
     
     Args:
         user_message_content: 消息内容
         session_context: 会话上下文
-        chat_id: 聊天ID
+        chat: 聊天对象（API结果直接设置到该对象上，由调用方负责保存）
         
     Returns:
-        API响应数据
+        (API响应数据, 更新后的聊天对象)
     """
+    chat_id = chat.chat_id
     try:
         logger.info(f"Calling Coze API for chat: {chat_id}")
         
         # 构建API请求
         # 根据 example.md，chat API URL 末尾需要添加 ? 符号
         api_url = config.api_url if config.api_url.endswith('?') else f"{config.api_url}?"
-        headers = {
-            'Authorization': config.authorization,
-            'Content-Type': 'application/json',
-            'User-Agent': 'CozeModule/1.0.0'
-        }
         
         # 根据配置决定是否使用流式响应
         # 如果 message/list API 权限不足，可以使用流式响应来获取消息
@@ -403,42 +484,41 @@ async def call_coze_api(user_message_content: str, session_context: Dict[str, An
             ],
         }
         
-        # 发送请求（使用httpx异步客户端）
-        async with httpx.AsyncClient(timeout=config.timeout) as client:
-            response = await client.post(
-                api_url,
-                headers=headers,
-                json=payload
+        # 发送请求（使用共享的httpx异步客户端，认证请求头已在客户端上设置）
+        client = get_coze_http_client()
+        response = await client.post(
+            api_url,
+            json=payload
+        )
+        
+        # 检查响应状态
+        if response.status_code == 429:
+            raise CozeAPIError("Rate limit exceeded", status_code=429)
+        elif response.status_code >= 400:
+            raise CozeAPIError(
+                f"API request failed with status {response.status_code}: {response.text}",
+                status_code=response.status_code
             )
-            
-            # 检查响应状态
-            if response.status_code == 429:
-                raise CozeAPIError("Rate limit exceeded", status_code=429)
-            elif response.status_code >= 400:
-                raise CozeAPIError(
-                    f"API request failed with status {response.status_code}: {response.text}",
-                    status_code=response.status_code
-                )
-            
-            # 解析响应
-            api_data = response.json()
-            logger.debug(f"Chat create response: {api_data}")
-            
-            if api_data.get('code') and api_data.get('code') != 0:
-                raise CozeAPIError(f"API returned error: {api_data.get('msg', 'Unknown error')}")
-            
-            # v3 API返回chat_id和conversation_id，需要轮询获取结果
-            data = api_data.get('data') or {}
-            api_chat_id = data.get('id')
-            conversation_id = data.get('conversation_id')
-            
-            # 检查响应中是否已经包含消息（非流式响应可能直接返回消息）
-            messages_in_response = data.get('messages', [])
-            if messages_in_response:
-                logger.info(f"Found {len(messages_in_response)} messages in create response")
-                # 如果创建响应中已经有消息，直接解析并返回
-                return await _parse_messages(messages_in_response, api_chat_id, conversation_id)
-            
+        
+        # 解析响应
+        api_data = response.json()
+        logger.debug(f"Chat create response: {api_data}")
+        
+        if api_data.get('code') and api_data.get('code') != 0:
+            raise CozeAPIError(f"API returned error: {api_data.get('msg', 'Unknown error')}")
+        
+        # v3 API返回chat_id和conversation_id，需要轮询获取结果
+        data = api_data.get('data') or {}
+        api_chat_id = data.get('id')
+        conversation_id = data.get('conversation_id')
+        
+        # 检查响应中是否已经包含消息（非流式响应可能直接返回消息）
+        messages_in_response = data.get('messages', [])
+        if messages_in_response:
+            logger.info(f"Found {len(messages_in_response)} messages in create response")
+            # 如果创建响应中已经有消息，直接解析
+            result = await _parse_messages(messages_in_response, api_chat_id, conversation_id)
+        else:
             if not api_chat_id or not conversation_id:
                 raise CozeAPIError("No chat_id or conversation_id in API response")
             
@@ -446,24 +526,19 @@ async def call_coze_api(user_message_content: str, session_context: Dict[str, An
             
             # 轮询获取结果
             result = await _poll_chat_result(api_chat_id, conversation_id)
-            if not result:
-                raise CozeAPIError("Failed to get chat result")
-            
-            # 更新聊天对象
-            redis_client = await get_coze_redis_client()
-            chat_data = await redis_client.get_chat_result(chat_id)
-            if chat_data:
-                chat = CozeChat.from_dict(chat_data)
-                chat.set_api_result(
-                    content=result.get('content', ''),
-                    reasoning_content=result.get('reasoning_content', ''),
-                    follow_up_questions=result.get('follow_up_questions', []),
-                    metadata=result.get('metadata', {})
-                )
-                # 保存更新后的聊天数据
-                await redis_client.set_chat_result(chat_id, chat.to_dict())
-            
-            return result
+        
+        if not result:
+            raise CozeAPIError("Failed to get chat result")
+        
+        # 更新聊天对象
+        chat.set_api_result(
+            content=result.get('content', ''),
+            reasoning_content=result.get('reasoning_content', ''),
+            follow_up_questions=result.get('follow_up_questions', []),
+            metadata=result.get('metadata', {})
+        )
+        
+        return result, chat
         
     except httpx.TimeoutException:
         raise CozeTimeoutError("API request timeout")
@@ -488,39 +563,35 @@ async def _parse_messages(messages: List[Dict[str, Any]], chat_id: str, conversa
     Returns:
         解析后的结果字典或None
     """
-    assistant_content = ''
-    reasoning_content = ''
+    # 按消息类型写入的结果字段（follow_up 可能有多条，单独追加）
+    fields = {'content': '', 'reasoning_content': ''}
     follow_up_questions = []
     
+    # 只处理assistant消息；答案之后仍可能有思考过程和建议问题，需遍历全部消息
     for msg in messages:
-        if not msg:
+        if not msg or msg.get('role') != 'assistant':
             continue
-            
-        msg_role = msg.get('role', '')
+        
         msg_type = msg.get('type', '')
         msg_content = msg.get('content', '')
         
-        logger.info(f"Processing message: role={msg_role}, type={msg_type}, content={msg_content[:50] if msg_content else 'None'}...")
-        
-        if msg_role == 'assistant':
-            if msg_type == 'answer':
-                # 主要回答内容
-                assistant_content = msg_content
-                logger.info(f"Found assistant answer: {len(assistant_content)} chars")
-            elif msg_type == 'verbose':
-                # 思考过程
-                reasoning_content = msg_content
-                logger.info(f"Found reasoning content: {len(reasoning_content)} chars")
-            elif msg_type == 'follow_up':
-                # 建议问题
-                if msg_content:
-                    follow_up_questions.append(msg_content)
-                logger.info(f"Found follow-up question: {msg_content}")
-            else:
-                # 如果没有明确的类型，但是assistant消息，可能是主要回答
-                if not assistant_content and msg_content:
-                    assistant_content = msg_content
-                    logger.info(f"Found assistant content (no type): {len(assistant_content)} chars")
+        if _DEBUG_ENABLED:
+            logger.debug("Processing message: type={}, content={}...", msg_type, msg_content[:50] if msg_content else 'None')
+        
+        field_name = _MESSAGE_TYPE_FIELDS.get(msg_type)
+        if field_name:
+            # answer 为主要回答内容，verbose 为思考过程
+            fields[field_name] = msg_content
+        elif msg_type == 'follow_up':
+            # 建议问题
+            if msg_content:
+                follow_up_questions.append(msg_content)
+        elif not fields['content'] and msg_content:
+            # 如果没有明确的类型，但是assistant消息，可能是主要回答
+            fields['content'] = msg_content
+    
+    assistant_content = fields['content']
+    reasoning_content = fields['reasoning_content']
     
     if assistant_content:
         result = {
@@ -534,7 +605,7 @@ async def _parse_messages(messages: List[Dict[str, Any]], chat_id: str, conversa
                 'message_count': len(messages)
             }
         }
-        logger.info(f"Parsed result: content={len(assistant_content)} chars, reasoning={len(reasoning_content)} chars, questions={len(follow_up_questions)}")
+        logger.info("Parsed result: content={} chars, reasoning={} chars, questions={}", len(assistant_content), len(reasoning_content), len(follow_up_questions))
         return result
     
     logger.warning("No assistant answer found in messages")
@@ -547,7 +618,7 @@ async def _poll_chat_result(chat_id: str, conversation_id: str) -> Optional[Dict
     根据测试脚本和 example.md，实现有限轮询，根据对话状态判断是否继续
     
     轮询逻辑：
-    - 最多轮询30次，每次间隔2秒（最多60秒）
+    - 轮询间隔从0.25秒开始按1.5倍指数增长，上限3秒，并附加少量随机抖动；累计最多等待60秒
     - 只有当 status == "in_progress" 时才继续轮询
     - status == "completed" 时停止轮询，获取消息
     - status == "failed" 时立即返回 None
@@ -559,176 +630,176 @@ async def _poll_chat_result(chat_id: str, conversation_id: str) -> Optional[Dict
     Returns:
         聊天结果或None
     """
-    # 根据测试脚本，最多轮询30次，每次间隔2秒，最多60秒
-    max_attempts = 30
-    poll_interval = 2
+    # 轮询截止时间（与原先固定间隔轮询的最长等待时间一致）
+    deadline = time.monotonic() + _POLL_TIMEOUT
     
-    async with httpx.AsyncClient(timeout=config.timeout) as client:
-        headers = {
-            'Authorization': config.authorization,
-            'Content-Type': 'application/json'
-        }
-        
-        for attempt in range(max_attempts):
-            try:
-                # 获取聊天状态 - 参数顺序：conversation_id 在前，chat_id 在后，末尾添加 & 符合 API 格式
-                status_url = f"{config.base_url}/chat/retrieve?conversation_id={conversation_id}&chat_id={chat_id}&"
-                status_response = await client.get(status_url, headers=headers)
-                
-                if status_response.status_code != 200:
-                    logger.warning(f"Status check failed: {status_response.status_code}")
-                    # 如果是最后一次尝试，抛出错误
-                    if attempt == max_attempts - 1:
-                        raise CozeAPIError(f"Failed to retrieve chat status after {max_attempts} attempts")
-                    await asyncio.sleep(poll_interval)
-                    continue
+    # 使用共享的httpx异步客户端，轮询请求复用同一连接
+    client = get_coze_http_client()
+    
+    for attempt in range(_POLL_MAX_ATTEMPTS):
+        # 本次轮询后的等待时间；若等待后将超过截止时间，则本次为最后一次尝试
+        delay = _poll_delay(attempt)
+        is_last = attempt == _POLL_MAX_ATTEMPTS - 1 or time.monotonic() + delay > deadline
+        try:
+            # 获取聊天状态 - 参数顺序：conversation_id 在前，chat_id 在后，末尾添加 & 符合 API 格式
+            status_url = f"{config.base_url}/chat/retrieve?conversation_id={conversation_id}&chat_id={chat_id}&"
+            status_response = await client.get(status_url)
+            
+            if status_response.status_code != 200:
+                logger.warning(f"Status check failed: {status_response.status_code}")
+                # 如果是最后一次尝试，抛出错误
+                if is_last:
+                    raise CozeAPIError(f"Failed to retrieve chat status after {attempt + 1} attempts")
+                await asyncio.sleep(delay)
+                continue
+            
+            status_data = status_response.json()
+            # 检查响应体中的 code 字段
+            response_code = status_data.get('code')
+            if response_code and response_code != 0:
+                error_msg = status_data.get('msg', 'Unknown error')
+                logger.warning(f"Status API returned error code {response_code}: {error_msg}")
+                # 如果是认证错误，抛出异常
+                if response_code in (4100, 4101):
+                    raise CozeAPIError(f"Authentication failed: {error_msg}", status_code=401)
+                # 如果是最后一次尝试，抛出错误
+                if is_last:
+                    raise CozeAPIError(f"Status API error after {attempt + 1} attempts: {error_msg}")
+                await asyncio.sleep(delay)
+                continue
                 
-                status_data = status_response.json()
-                # 检查响应体中的 code 字段
-                response_code = status_data.get('code')
-                if response_code and response_code != 0:
-                    error_msg = status_data.get('msg', 'Unknown error')
-                    logger.warning(f"Status API returned error code {response_code}: {error_msg}")
-                    # 如果是认证错误，抛出异常
-                    if response_code in (4100, 4101):
-                        raise CozeAPIError(f"Authentication failed: {error_msg}", status_code=401)
-                    # 如果是最后一次尝试，抛出错误
-                    if attempt == max_attempts - 1:
-                        raise CozeAPIError(f"Status API error after {max_attempts} attempts: {error_msg}")
-                    await asyncio.sleep(poll_interval)
-                    continue
-                    
-                status = status_data.get('data', {}).get('status')
+            status = status_data.get('data', {}).get('status')
+            
+            logger.info(f"Poll attempt {attempt + 1}: status = {status}")
+            
+            # 根据状态判断下一步操作（参考测试脚本逻辑）
+            if status == 'completed':
+                # 首先检查 retrieve 响应是否已经包含消息
+                retrieve_data = status_data.get('data', {})
+                messages = retrieve_data.get('messages', [])
                 
-                logger.info(f"Poll attempt {attempt + 1}/{max_attempts}: status = {status}")
+                # 记录 retrieve 响应的数据结构以便调试
+                logger.debug(f"Retrieve response data keys: {list(retrieve_data.keys()) if isinstance(retrieve_data, dict) else 'not a dict'}")
+                if not messages:
+                    logger.warning(f"No messages found in retrieve response. Full data structure: {retrieve_data}")
                 
-                # 根据状态判断下一步操作（参考测试脚本逻辑）
-                if status == 'completed':
-                    # 首先检查 retrieve 响应是否已经包含消息
-                    retrieve_data = status_data.get('data', {})
-                    messages = retrieve_data.get('messages', [])
+                # 如果 retrieve 响应中没有消息，调用消息列表 API
+                if not messages:
+                    logger.info("No messages in retrieve response, calling message list API...")
+                    # 等待一小段时间，确保消息已经准备好（根据 example.md，completed 后消息可能需要一点时间）
+                    await asyncio.sleep(0.5)
                     
-                    # 记录 retrieve 响应的数据结构以便调试
-                    logger.debug(f"Retrieve response data keys: {list(retrieve_data.keys()) if isinstance(retrieve_data, dict) else 'not a dict'}")
-                    if not messages:
-                        logger.warning(f"No messages found in retrieve response. Full data structure: {retrieve_data}")
+                    # 根据 Coze 新接口描述，消息列表使用 v1 conversation/message/list
+                    if '/v3' in config.base_url:
+                        messages_base_url = config.base_url.replace('/v3', '/v1', 1)
+                    else:
+                        messages_base_url = f"{config.base_url.rstrip('/')}/v1"
+                    messages_url = f"{messages_base_url}/conversation/message/list?conversation_id={conversation_id}"
+                    # 记录请求信息（不记录完整的 token）
+                    auth_header_preview = config.authorization[:20] + "..." if len(config.authorization) > 20 else config.authorization
+                    logger.info(f"Requesting messages from: {messages_url}")
+                    logger.debug(f"Authorization header: {auth_header_preview}")
                     
-                    # 如果 retrieve 响应中没有消息，调用消息列表 API
-                    if not messages:
-                        logger.info("No messages in retrieve response, calling message list API...")
-                        # 等待一小段时间，确保消息已经准备好（根据 example.md，completed 后消息可能需要一点时间）
-                        await asyncio.sleep(0.5)
-                        
-                        # 根据 Coze 新接口描述，消息列表使用 v1 conversation/message/list
-                        if '/v3' in config.base_url:
-                            messages_base_url = config.base_url.replace('/v3', '/v1', 1)
-                        else:
-                            messages_base_url = f"{config.base_url.rstrip('/')}/v1"
-                        messages_url = f"{messages_base_url}/conversation/message/list?conversation_id={conversation_id}"
-                        # 记录请求信息（不记录完整的 token）
-                        auth_header_preview = config.authorization[:20] + "..." if len(config.authorization) > 20 else config.authorization
-                        logger.info(f"Requesting messages from: {messages_url}")
-                        logger.debug(f"Authorization header: {auth_header_preview}")
-                        
-                        # 重试机制：如果认证失败，可能是 token 权限问题，但先尝试一次
-                        # 确保 headers 格式正确，与 example.md 中的格式一致
-                        messages_response = await client.get(
-                            messages_url, 
-                            headers=headers,
-                            follow_redirects=True
-                        )
-                        
-                        logger.info(f"Messages API response status: {messages_response.status_code}")
+                    # 重试机制：如果认证失败，可能是 token 权限问题，但先尝试一次
+                    # 认证请求头由共享客户端统一设置，格式与 example.md 一致
+                    messages_response = await client.get(
+                        messages_url, 
+                        follow_redirects=True
+                    )
+                    
+                    logger.info(f"Messages API response status: {messages_response.status_code}")
+                    
+                    if messages_response.status_code == 200:
+                        messages_data = messages_response.json()
+                        logger.debug(f"Messages response: {messages_data}")
                         
-                        if messages_response.status_code == 200:
-                            messages_data = messages_response.json()
-                            logger.debug(f"Messages response: {messages_data}")
-                            
-                            # 检查响应体中的 code 字段
-                            response_code = messages_data.get('code')
-                            if response_code and response_code != 0:
-                                error_msg = messages_data.get('msg', 'Unknown error')
-                                logger.error(f"Messages API returned error code {response_code}: {error_msg}")
-                                
-                                # 如果是认证错误（4100/4101），说明 token 具备基础鉴权但缺少会话消息读取权限
-                                if response_code in (4100, 4101):
-                                    error_detail = (
-                                        f"Token authentication/authorization failed for conversation message list API (code {response_code}). "
-                                        f"This indicates the token lacks permission to access the conversation/message/list endpoint. "
-                                        f"Please check your token permissions in Coze platform and ensure conversation message read scope is enabled."
-                                    )
-                                    logger.error(error_detail)
-                                    raise CozeAPIError(
-                                        f"Token permission insufficient: {error_msg}. "
-                                        f"Please ensure your token has permission to access /v1/conversation/message/list endpoint.",
-                                        status_code=401
-                                    )
-                                else:
-                                    raise CozeAPIError(f"API error {response_code}: {error_msg}")
+                        # 检查响应体中的 code 字段
+                        response_code = messages_data.get('code')
+                        if response_code and response_code != 0:
+                            error_msg = messages_data.get('msg', 'Unknown error')
+                            logger.error(f"Messages API returned error code {response_code}: {error_msg}")
                             
-                            # v3 API响应格式: {"code":0,"data":[...]} - data 是数组
-                            data = messages_data.get('data', [])
-                            if isinstance(data, list):
-                                messages = data
-                            elif isinstance(data, dict):
-                                # 兼容处理：如果 data 是对象，尝试获取 messages 字段
-                                messages = data.get('messages', [])
+                            # 如果是认证错误（4100/4101），说明 token 具备基础鉴权但缺少会话消息读取权限
+                            if response_code in (4100, 4101):
+                                error_detail = (
+                                    f"Token authentication/authorization failed for conversation message list API (code {response_code}). "
+                                    f"This indicates the token lacks permission to access the conversation/message/list endpoint. "
+                                    f"Please check your token permissions in Coze platform and ensure conversation message read scope is enabled."
+                                )
+                                logger.error(error_detail)
+                                raise CozeAPIError(
+                                    f"Token permission insufficient: {error_msg}. "
+                                    f"Please ensure your token has permission to access /v1/conversation/message/list endpoint.",
+                                    status_code=401
+                                )
                             else:
-                                messages = []
-                            
-                            logger.info(f"Retrieved {len(messages)} messages from message list API")
+                                raise CozeAPIError(f"API error {response_code}: {error_msg}")
+                        
+                        # v3 API响应格式: {"code":0,"data":[...]} - data 是数组
+                        data = messages_data.get('data', [])
+                        if isinstance(data, list):
+                            messages = data
+                        elif isinstance(data, dict):
+                            # 兼容处理：如果 data 是对象，尝试获取 messages 字段
+                            messages = data.get('messages', [])
                         else:
-                            # completed 状态下获取消息失败，应该抛出错误，不再继续轮询
-                            error_text = messages_response.text
-                            logger.error(f"Failed to get messages: {messages_response.status_code} - {error_text}")
-                            raise CozeAPIError(
-                                f"Failed to get messages after chat completed: {messages_response.status_code} - {error_text}",
-                                status_code=messages_response.status_code
-                            )
+                            messages = []
+                        
+                        logger.info(f"Retrieved {len(messages)} messages from message list API")
                     else:
-                        logger.info(f"Found {len(messages)} messages in retrieve response")
-                    
-                    # 解析消息，提取思考过程、回答和建议
-                    logger.info(f"Found {len(messages)} messages")
-                    result = await _parse_messages(messages, chat_id, conversation_id)
-                    if result:
-                        return result
-                    
-                    # completed 状态下没有找到 assistant 回答，返回 None（不再继续轮询）
-                    logger.warning("No assistant answer found in completed chat")
-                    return None
-                    
-                elif status == 'failed':
-                    # failed 状态立即返回，不再继续轮询
-                    logger.error(f"Chat failed: {chat_id}")
-                    return None
-                    
-                elif status == 'in_progress':
-                    # 只有 in_progress 状态才继续轮询
-                    await asyncio.sleep(poll_interval)
-                    continue
+                        # completed 状态下获取消息失败，应该抛出错误，不再继续轮询
+                        error_text = messages_response.text
+                        logger.error(f"Failed to get messages: {messages_response.status_code} - {error_text}")
+                        raise CozeAPIError(
+                            f"Failed to get messages after chat completed: {messages_response.status_code} - {error_text}",
+                            status_code=messages_response.status_code
+                        )
                 else:
-                    # 未知状态，记录警告并继续轮询（但有限制）
-                    logger.warning(f"Unknown status: {status}, continuing to poll...")
-                    if attempt == max_attempts - 1:
-                        raise CozeAPIError(f"Chat status remained unknown after {max_attempts} attempts: {status}")
-                    await asyncio.sleep(poll_interval)
-                    continue
+                    logger.info(f"Found {len(messages)} messages in retrieve response")
                 
-            except CozeAPIError:
-                # 如果是 CozeAPIError，直接抛出，不再继续轮询
-                raise
-            except Exception as e:
-                logger.error(f"Error polling chat result (attempt {attempt + 1}/{max_attempts}): {str(e)}")
-                # 如果是最后一次尝试，抛出错误
-                if attempt == max_attempts - 1:
-                    raise CozeAPIError(f"Failed to poll chat result after {max_attempts} attempts: {str(e)}")
-                await asyncio.sleep(poll_interval)
+                # 解析消息，提取思考过程、回答和建议
+                logger.info(f"Found {len(messages)} messages")
+                result = await _parse_messages(messages, chat_id, conversation_id)
+                if result:
+                    return result
+                
+                # completed 状态下没有找到 assistant 回答，返回 None（不再继续轮询）
+                logger.warning("No assistant answer found in completed chat")
+                return None
+                
+            elif status == 'failed':
+                # failed 状态立即返回，不再继续轮询
+                logger.error(f"Chat failed: {chat_id}")
+                return None
+                
+            elif status == 'in_progress':
+                # 只有 in_progress 状态才继续轮询
+                if is_last:
+                    break
+                await asyncio.sleep(delay)
                 continue
+            else:
+                # 未知状态，记录警告并继续轮询（但有限制）
+                logger.warning(f"Unknown status: {status}, continuing to poll...")
+                if is_last:
+                    raise CozeAPIError(f"Chat status remained unknown after {attempt + 1} attempts: {status}")
+                await asyncio.sleep(delay)
+                continue
+            
+        except CozeAPIError:
+            # 如果是 CozeAPIError，直接抛出，不再继续轮询
+            raise
+        except Exception as e:
+            logger.error(f"Error polling chat result (attempt {attempt + 1}): {str(e)}")
+            # 如果是最后一次尝试，抛出错误
+            if is_last:
+                raise CozeAPIError(f"Failed to poll chat result after {attempt + 1} attempts: {str(e)}")
+            await asyncio.sleep(delay)
+            continue
     
-    # 如果循环结束还没有返回，说明达到最大尝试次数
-    logger.error(f"Polling timeout for chat: {chat_id} after {max_attempts} attempts")
-    raise CozeAPIError(f"Polling timeout: Chat {chat_id} did not complete within {max_attempts * poll_interval} seconds")
+    # 如果循环结束还没有返回，说明已达到轮询截止时间
+    logger.error(f"Polling timeout for chat: {chat_id} after {attempt + 1} attempts")
+    raise CozeAPIError(f"Polling timeout: Chat {chat_id} did not complete within {_POLL_TIMEOUT} seconds")
 
 
 # ==================== 清理任务 ====================
@@ -744,36 +815,49 @@ async def cleanup_expired_sessions_task() -> Dict[str, Any]:
         logger.info("Starting expired sessions cleanup")
         
         redis_client = await get_coze_redis_client()
-        active_sessions = await redis_client.get_active_sessions()
+        await redis_client.migrate_legacy_active_sessions()
+        
+        # 活跃会话按预计过期时间排序，只需检查分数已到期的会话
+        now = time.time()
+        due_sessions = await redis_client.get_due_active_sessions(now)
         expired_count = 0
         
-        for session_id in active_sessions:
-            try:
-                session_data = await redis_client.get_session(session_id)
-                if not session_data:
-                    # 会话数据不存在，从活跃列表中移除
-                    await redis_client.remove_active_session(session_id)
-                    expired_count += 1
-                    continue
-                
-                session = CozeSession.from_dict(session_data)
-                
-                # 检查是否过期
-                if session and session.expires_at:
-                    expires_timestamp = datetime.fromisoformat(session.expires_at.replace('Z', '+00:00')).timestamp()
-                    if time.time() > expires_timestamp:
-                        # 标记为过期并从活跃列表移除
-                        session.status = SessionStatus.EXPIRED
-                        await redis_client.set_session(session_id, session.to_dict())
-                        await redis_client.remove_active_session(session_id)
-                        if session.user_id:
-                            await redis_client.remove_user_session(session.user_id, session_id)
-                        expired_count += 1
+        # 分批处理：每批一次管道读取会话，一次事务写回过期会话、解除登记并顺延被续期会话的分数
+        for start in range(0, len(due_sessions), _CLEANUP_BATCH_SIZE):
+            batch = due_sessions[start:start + _CLEANUP_BATCH_SIZE]
+            sessions_data = await redis_client.get_sessions(batch)
+            expired_sessions: Dict[str, Dict[str, Any]] = {}
+            stale_ids: List[str] = []
+            rescheduled: Dict[str, float] = {}
+            
+            for session_id in batch:
+                try:
+                    session_data = sessions_data.get(session_id)
+                    if not session_data:
+                        # 会话数据已由Redis按TTL删除，从活跃列表中移除
+                        stale_ids.append(session_id)
+                        continue
+                    
+                    session = CozeSession.from_dict(session_data, validate=False)
+                    
+                    # 检查是否过期（使用会话中保存的epoch秒，无需解析ISO时间字符串）
+                    if session and session.is_past_expiry(now):
+                        # 标记为过期，随本批写回并从活跃列表移除
+                        session.mark_expired()
+                        expired_sessions[session_id] = session.to_dict()
                         logger.info(f"Expired session cleaned: {session_id}")
-                        
-            except Exception as e:
-                logger.error(f"Error processing session {session_id} during cleanup: {str(e)}")
-                continue
+                    else:
+                        # 会话键期间被续期，顺延到下一个可能的过期时间
+                        expires_ts = session.get_expires_timestamp()
+                        next_check = now + config.session_expire
+                        rescheduled[session_id] = min(expires_ts, next_check) if expires_ts is not None else next_check
+                            
+                except Exception as e:
+                    logger.error(f"Error processing session {session_id} during cleanup: {str(e)}")
+                    continue
+            
+            await redis_client.expire_sessions(expired_sessions, stale_ids, rescheduled)
+            expired_count += len(expired_sessions) + len(stale_ids)
         
         logger.info(f"Expired sessions cleanup completed. Cleaned {expired_count} sessions")
         
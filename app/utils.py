@@ -4,9 +4,11 @@ Coze模块工具函数
 提供通用的工具函数和辅助方法
 """
 
+import os
+import json
 import uuid
 import time
-import json
+import orjson
 import hashlib
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, Union, List
@@ -23,7 +25,7 @@ def generate_session_id() -> str:
         str: 会话ID
     """
     timestamp = str(int(time.time() * 1000))
-    random_part = str(uuid.uuid4()).replace('-', '')[:8]
+    random_part = os.urandom(4).hex()
     return f"coze_session_{timestamp}_{random_part}"
 
 
@@ -35,7 +37,7 @@ def generate_chat_id() -> str:
         str: 聊天ID
     """
     timestamp = str(int(time.time() * 1000))
-    random_part = str(uuid.uuid4()).replace('-', '')[:8]
+    random_part = os.urandom(4).hex()
     return f"coze_chat_{timestamp}_{random_part}"
 
 
@@ -72,6 +74,16 @@ def format_timestamp(dt: datetime) -> str:
     return dt.isoformat()
 
 
+def current_timestamp_str() -> str:
+    """
+    获取当前UTC时间的ISO格式字符串（等价于 format_timestamp(get_current_timestamp())）
+    
+    Returns:
+        str: ISO格式时间字符串
+    """
+    return datetime.now(timezone.utc).isoformat()
+
+
 def parse_timestamp(timestamp_str: str) -> datetime:
     """
     解析ISO格式时间字符串
@@ -92,6 +104,30 @@ def parse_timestamp(timestamp_str: str) -> datetime:
         ) from e
 
 
+def _orjson_dumps(data: Any) -> bytes:
+    """
+    使用orjson序列化数据
+    
+    datetime、date、UUID等类型由orjson原生处理；先不带 default 回调序列化，
+    仅在遇到不支持的类型（如Decimal）时才回退到 default=str 重新序列化；
+    orjson仍无法处理的数据（如超过64位的整数）交给标准库json序列化
+    
+    Args:
+        data: 要序列化的数据
+    
+    Returns:
+        bytes: JSON bytes
+    """
+    try:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        pass
+    try:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+
+
 def safe_json_dumps(data: Any, default_value: str = "{}") -> str:
     """
     安全的JSON序列化
@@ -104,30 +140,57 @@ def safe_json_dumps(data: Any, default_value: str = "{}") -> str:
         str: JSON字符串
     """
     try:
-        return json.dumps(data, ensure_ascii=False, default=str)
+        return _orjson_dumps(data).decode("utf-8")
     except (TypeError, ValueError) as e:
         logger = get_coze_logger()
         logger.warning(f"JSON serialization failed: {e}, using default value")
         return default_value
 
 
-def safe_json_loads(json_str: str, default_value: Any = None) -> Any:
+def safe_json_dumps_bytes(data: Any, default_value: bytes = b"{}") -> bytes:
+    """
+    安全的JSON序列化，直接返回UTF-8编码的bytes（写入Redis时无需再解码为str）
+    
+    Args:
+        data: 要序列化的数据
+        default_value: 序列化失败时的默认值
+    
+    Returns:
+        bytes: JSON bytes
+    """
+    try:
+        return _orjson_dumps(data)
+    except (TypeError, ValueError) as e:
+        logger = get_coze_logger()
+        logger.warning(f"JSON serialization failed: {e}, using default value")
+        return default_value
+
+
+def safe_json_loads(json_str: Union[str, bytes], default_value: Any = None) -> Any:
     """
     安全的JSON反序列化
     
     Args:
-        json_str: JSON字符串
+        json_str: JSON字符串或UTF-8编码的bytes（orjson均可直接解析）
         default_value: 反序列化失败时的默认值
     
     Returns:
         Any: 反序列化后的数据
     """
     try:
-        return json.loads(json_str)
-    except (TypeError, ValueError, json.JSONDecodeError) as e:
-        logger = get_coze_logger()
-        logger.warning(f"JSON deserialization failed: {e}, using default value")
-        return default_value
+        return orjson.loads(json_str)
+    except orjson.JSONDecodeError as e:
+        # orjson 不接受 NaN/Infinity 等非标准字面量，旧数据可能由标准库 json 写入，回退后再试一次
+        try:
+            return json.loads(json_str)
+        except (TypeError, ValueError):
+            pass
+        error = e
+    except (TypeError, ValueError) as e:
+        error = e
+    logger = get_coze_logger()
+    logger.warning(f"JSON deserialization failed: {error}, using default value")
+    return default_value
 
 
 def validate_message(message: str, max_length: int = 4000) -> bool:
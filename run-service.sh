@@ -518,12 +518,12 @@ log_info "  Log level: $LOG_LEVEL"
 log_info "  Host: $HOST"
 log_info "  Port: $PORT"
 log_info "  REDIS_URL: ${REDIS_URL}"
-log_info "  Startup command: uv run python3 -m uvicorn app.main:app --host $HOST --port $PORT"
+log_info "  Startup command: uv run python3 -m uvicorn app.main:app --host $HOST --port $PORT --loop uvloop --http httptools --no-server-header --no-access-log"
 log_info "  Coze API URL: ${COZE_API_URL}"
 log_info "  Coze Base URL: ${COZE_BASE_URL}"
 
 # 使用全局Python，通过uv运行（显式 REDIS_URL，与嵌入式 Redis 端口一致；可被外层已 export 的 REDIS_URL 覆盖）
-tmux send-keys -t coze-fastapi:service.1 "cd '$PWD' && echo 'Coze FastAPI Service' && echo '====================' && export APP_MODE='$MODE' && export ENABLE_AUTH='$ENABLE_AUTH' && export COZE_LOG_LEVEL='$LOG_LEVEL' && export PORT='$PORT' && export HOST='$HOST' && export REDIS_URL='${REDIS_URL}' && export COZE_API_URL='$COZE_API_URL' && export COZE_BASE_URL='$COZE_BASE_URL' && uv run python3 -m uvicorn app.main:app --host $HOST --port $PORT" Enter || {
+tmux send-keys -t coze-fastapi:service.1 "cd '$PWD' && echo 'Coze FastAPI Service' && echo '====================' && export APP_MODE='$MODE' && export ENABLE_AUTH='$ENABLE_AUTH' && export COZE_LOG_LEVEL='$LOG_LEVEL' && export PORT='$PORT' && export HOST='$HOST' && export REDIS_URL='${REDIS_URL}' && export COZE_API_URL='$COZE_API_URL' && export COZE_BASE_URL='$COZE_BASE_URL' && uv run python3 -m uvicorn app.main:app --host $HOST --port $PORT --loop uvloop --http httptools --no-server-header --no-access-log" Enter || {
     log_error "Unable to start FastAPI service"
     exit 1
 }
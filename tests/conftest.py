@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+使用 fakeredis 替代真实Redis，每个测试使用独立的内存服务器
+"""
+
+import os
+import tempfile
+
+# 导入应用模块前设置必填配置
+os.environ.setdefault("COZE_API_TOKEN", "test-token")
+os.environ.setdefault("COZE_BOT_ID", "test-bot")
+
+from app.logging_config import configure_coze_logging
+
+# 日志写入临时目录，不在项目根目录下创建logs
+configure_coze_logging(tempfile.mkdtemp(prefix="coze-test-logs-"))
+
+import fakeredis
+import pytest
+import redis.asyncio as redis
+from cachetools import TTLCache
+from fakeredis.aioredis import FakeConnection
+
+from app import redis_client as redis_client_module
+from app.redis_client import CozeRedisClient
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """将 BlockingConnectionPool 的连接替换为 fakeredis 连接"""
+    server = fakeredis.FakeServer()
+    original = redis.BlockingConnectionPool.from_url.__func__
+    
+    def from_url(cls, url, **kwargs):
+        # FakeConnection 不执行健康检查
+        kwargs.pop("health_check_interval", None)
+        return original(cls, url, connection_class=FakeConnection, server=server, **kwargs)
+    
+    monkeypatch.setattr(redis.BlockingConnectionPool, "from_url", classmethod(from_url))
+    yield server
+    redis_client_module._redis_client = None
+
+
+@pytest.fixture
+def connect_client(fake_redis):
+    """返回创建已连接客户端的协程函数，并将其注册为全局单例"""
+    
+    async def connect(read_cache_ttl: float = 0.0) -> CozeRedisClient:
+        client = CozeRedisClient("redis://localhost:6380/0")
+        await client.connect()
+        client._read_cache = TTLCache(maxsize=100, ttl=read_cache_ttl) if read_cache_ttl > 0 else None
+        redis_client_module._redis_client = client
+        return client
+    
+    return connect
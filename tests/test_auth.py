@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+认证测试：token/host 的本地校验只拒绝控制字符，其余交由验证服务判断；
+认证失败时只有匹配路由的请求返回401，其余交由路由返回404/405
+"""
+
+import asyncio
+import copy
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import auth
+from app.config import get_coze_config
+from app.routes import router
+
+
+@pytest.fixture
+def verified_tokens(monkeypatch):
+    """替换 verify_jwt_token，记录送往验证服务的token，并全部视为验证通过"""
+    tokens = []
+    
+    async def verify_jwt_token(http_scheme, request_host, root_token, request_url=None):
+        tokens.append(root_token)
+        return True
+    
+    monkeypatch.setattr(auth, "verify_jwt_token", verify_jwt_token)
+    return tokens
+
+
+@pytest.mark.parametrize("token", ["abc.def.ghi", "Bearer abc~def", "tok%en!*"])
+def test_token_format_is_left_to_verifier(verified_tokens, token):
+    result = asyncio.run(auth.verify_host_token(get_coze_config(), token, b"admin.alchemy-studio.cn"))
+    assert result is None
+    assert verified_tokens == [token]
+
+
+@pytest.mark.parametrize("host", [b"https://admin.alchemy-studio.cn", b"my_admin.alchemy-studio.cn:8080"])
+def test_host_is_matched_by_substring(verified_tokens, host):
+    assert asyncio.run(auth.verify_host_token(get_coze_config(), "abc", host)) is None
+
+
+def test_control_characters_are_rejected_locally(verified_tokens):
+    config = get_coze_config()
+    assert asyncio.run(auth.verify_host_token(config, "abc\x01", b"admin.alchemy-studio.cn")) == "HtySudoerToken invalid"
+    assert asyncio.run(auth.verify_host_token(config, "abc", b"alchemy-studio.cn\x7f")) == "Request header host invalid"
+    assert verified_tokens == []
+
+
+@pytest.fixture
+def auth_client():
+    """只挂载路由和认证中间件的应用（始终启用认证）"""
+    config = copy.copy(get_coze_config())
+    config.enable_auth = True
+    app = FastAPI()
+    app.add_middleware(auth.AuthASGIMiddleware, config=config)
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("method, path, status", [
+    ("GET", "/sessions/abc", 401),
+    ("POST", "/admin/cleanup", 401),
+    ("GET", "/nope", 404),
+    ("DELETE", "/admin/stats", 405),
+])
+def test_unauthenticated_request_status(auth_client, verified_tokens, method, path, status):
+    response = auth_client.request(method, path)
+    assert response.status_code == status
+    if status == 401:
+        assert response.json()["error"]["message"] == "HtySudoerToken not found in header"
+    assert verified_tokens == []
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+过期会话清理测试：过期会话标记为expired，数据已被删除的会话从活跃列表移除，
+被续期的会话按新的过期时间重新排期，旧版活跃会话集合迁移到有序集合
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app import tasks
+from app.config import get_coze_config
+from app.models import CozeSession
+
+
+def test_cleanup_expires_sessions_and_drops_stale_ids(connect_client, monkeypatch):
+    # 每批只处理一个会话，覆盖多批次的情况
+    monkeypatch.setattr(tasks, "_CLEANUP_BATCH_SIZE", 1)
+    
+    async def main():
+        client = await connect_client()
+        expired_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        alive_id = (await tasks.create_session_task("u2"))["data"]["session_id"]
+        
+        session = CozeSession.from_dict(await client.get_session(expired_id), validate=False)
+        session.set_expires_at("2000-01-01T00:00:00+00:00")
+        await client.set_session(expired_id, session.to_dict())
+        # 会话数据已不存在但仍登记为活跃
+        await client.redis_client.zadd(client._active_sessions_key, {"ghost": 1})
+        
+        result = await tasks.cleanup_expired_sessions_task()
+        
+        assert result["data"]["expired_count"] == 2
+        assert (await client.get_session(expired_id))["status"] == "expired"
+        assert (await client.get_session(alive_id))["status"] == "active"
+        assert sorted(await client.get_active_sessions()) == [alive_id]
+    
+    asyncio.run(main())
+
+
+def test_renewed_session_is_rescheduled(connect_client):
+    async def main():
+        client = await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        # 分数已到期但会话未过期（例如期间被续期）
+        await client.redis_client.zadd(client._active_sessions_key, {session_id: 1})
+        
+        result = await tasks.cleanup_expired_sessions_task()
+        
+        assert result["data"]["expired_count"] == 0
+        assert await client.get_due_active_sessions() == []
+        # 会话未设置过期时间，顺延一个会话过期周期后再检查
+        score = await client.redis_client.zscore(client._active_sessions_key, session_id)
+        assert score == pytest.approx(time.time() + get_coze_config().session_expire, abs=5)
+    
+    asyncio.run(main())
+
+
+def test_legacy_active_set_is_migrated(connect_client):
+    async def main():
+        client = await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        await client.redis_client.delete(client._active_sessions_key)
+        await client.redis_client.sadd(client._legacy_active_sessions_key, session_id, "ghost")
+        
+        result = await tasks.cleanup_expired_sessions_task()
+        
+        assert result["data"]["expired_count"] == 1
+        assert not await client.redis_client.exists(client._legacy_active_sessions_key)
+        assert await client.get_active_sessions() == [session_id]
+        assert await client.get_due_active_sessions() == []
+    
+    asyncio.run(main())
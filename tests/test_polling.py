@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+聊天结果轮询测试：轮询间隔按指数退避增长且有上限，累计等待不超过截止时间
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import tasks
+from app.exceptions import CozeAPIError
+
+
+def test_poll_delay_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(tasks.random, "uniform", lambda a, b: 0.0)
+    delays = [tasks._poll_delay(attempt) for attempt in range(tasks._POLL_MAX_ATTEMPTS)]
+    
+    assert delays[0] == tasks._POLL_INITIAL_DELAY
+    assert delays == sorted(delays)
+    assert max(delays) == tasks._POLL_MAX_DELAY
+
+
+def test_poll_delay_jitter_is_bounded():
+    for attempt in range(20):
+        base = min(tasks._POLL_MAX_DELAY, tasks._POLL_INITIAL_DELAY * tasks._POLL_BACKOFF ** attempt)
+        assert base <= tasks._poll_delay(attempt) <= base + tasks._POLL_JITTER
+
+
+class _InProgressClient:
+    """始终返回 in_progress 状态的Coze客户端"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def get(self, url, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(status_code=200, json=lambda: {"code": 0, "data": {"status": "in_progress"}})
+
+
+def test_polling_stops_at_deadline(monkeypatch):
+    clock = [0.0]
+    real_sleep = asyncio.sleep
+    
+    async def fake_sleep(delay):
+        clock[0] += delay
+        await real_sleep(0)
+    
+    client = _InProgressClient()
+    monkeypatch.setattr(tasks, "time", SimpleNamespace(monotonic=lambda: clock[0], time=time.time))
+    monkeypatch.setattr(tasks.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(tasks, "get_coze_http_client", lambda: client)
+    
+    with pytest.raises(CozeAPIError, match="Polling timeout"):
+        asyncio.run(tasks._poll_chat_result("chat1", "conv1"))
+    
+    # 再等待一次将超过截止时间时不再等待，累计等待时间接近但不超过截止时间
+    assert clock[0] <= tasks._POLL_TIMEOUT
+    assert clock[0] > tasks._POLL_TIMEOUT - tasks._POLL_MAX_DELAY - tasks._POLL_JITTER
+    assert client.calls < tasks._POLL_MAX_ATTEMPTS
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+CozeRedisClient 测试：共享读取与读缓存的失效、旧版JSON字符串会话的兼容
+"""
+
+import asyncio
+
+import orjson
+import pytest
+
+
+@pytest.mark.parametrize("read_cache_ttl", [0, 1.0])
+def test_write_invalidates_inflight_read(connect_client, read_cache_ttl):
+    """写入前发出的GET仍在进行时，写入之后的读取不会加入该GET而读到旧数据"""
+    
+    async def main():
+        client = await connect_client(read_cache_ttl)
+        await client.set_chat_result("c1", {"v": 1})
+        
+        gate = asyncio.Event()
+        original_get = client.redis_client.get
+        
+        async def gated_get(key):
+            value = await original_get(key)
+            await gate.wait()
+            return value
+        
+        client.redis_client.get = gated_get
+        stale_read = asyncio.ensure_future(client.get_chat_result("c1"))
+        await asyncio.sleep(0)
+        client.redis_client.get = original_get
+        
+        await client.set_chat_result("c1", {"v": 2})
+        fresh = await asyncio.wait_for(client.get_chat_result("c1"), timeout=5)
+        assert fresh["v"] == 2
+        
+        gate.set()
+        await stale_read
+        # 跨越写入的读取结果不会写入缓存
+        assert (await client.get_chat_result("c1"))["v"] == 2
+    
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("read_cache_ttl", [0, 1.0])
+def test_read_after_write_sees_new_data(connect_client, read_cache_ttl):
+    async def main():
+        client = await connect_client(read_cache_ttl)
+        session = {"session_id": "s1", "user_id": "u1", "status": "active"}
+        await client.set_session("s1", dict(session))
+        assert (await client.get_session("s1"))["status"] == "active"
+        
+        await client.set_session_fields("s1", {"status": "terminated"})
+        assert (await client.get_session("s1"))["status"] == "terminated"
+        
+        await client.delete_session("s1")
+        assert await client.get_session("s1") is None
+    
+    asyncio.run(main())
+
+
+def test_legacy_json_session_fallback(connect_client):
+    """旧版以JSON字符串存储的会话可正常读取，局部更新时改写为Hash"""
+    
+    async def main():
+        client = await connect_client()
+        key = client._session_prefix + "legacy"
+        legacy = {"session_id": "legacy", "user_id": "u1", "status": "active", "context": {"a": 1}}
+        await client.redis_client.set(key, orjson.dumps(legacy))
+        
+        assert await client.get_session("legacy") == legacy
+        assert orjson.loads(await client.get_session_raw("legacy")) == legacy
+        assert (await client.get_sessions(["legacy", "missing"])) == {"legacy": legacy}
+        
+        assert await client.set_session_fields("legacy", {"status": "expired"})
+        assert await client.redis_client.type(key) == b"hash"
+        assert await client.get_session("legacy") == {**legacy, "status": "expired"}
+    
+    asyncio.run(main())
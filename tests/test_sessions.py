@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+create_session_task 测试：会话、活跃会话、用户会话和用户记录由同一个Lua脚本写入
+"""
+
+import asyncio
+
+from app import tasks
+
+
+def test_create_session_writes_all_records(connect_client):
+    async def main():
+        client = await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        session_key = client._session_prefix + session_id
+        
+        assert await client.redis_client.type(session_key) == b"hash"
+        assert await client.redis_client.ttl(session_key) > 0
+        assert (await client.get_session(session_id))["user_id"] == "u1"
+        assert await client.redis_client.zscore(client._active_sessions_key, session_id) is not None
+        assert await client.get_user_sessions("u1") == [session_id]
+        
+        user = await client.get_value("user:u1")
+        assert user["user_id"] == "u1"
+        assert user["active_sessions"] == [session_id]
+    
+    asyncio.run(main())
+
+
+def test_create_session_updates_legacy_user_record(connect_client):
+    async def main():
+        client = await connect_client()
+        # 旧版本写入的用户记录为二次编码的JSON字符串
+        await client.set_value(
+            "user:u1", '{"user_id": "u1", "active_sessions": ["old"], "total_sessions": 1, "total_chats": 0}'
+        )
+        
+        first = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        second = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        
+        user = await client.get_value("user:u1")
+        assert isinstance(user, dict)
+        assert sorted(user["active_sessions"]) == sorted(["old", first, second])
+        assert user["total_sessions"] == 3
+        assert sorted(await client.get_user_sessions("u1")) == sorted([first, second])
+    
+    asyncio.run(main())
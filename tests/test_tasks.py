@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+send_message_task 测试：Idempotency-Key 去重只合并并发的相同请求
+"""
+
+import asyncio
+
+import pytest
+
+from app import tasks
+
+
+@pytest.fixture
+def fake_coze_api(monkeypatch):
+    """替换 call_coze_api，记录调用次数"""
+    calls = []
+    
+    async def call_coze_api(user_message_content, session_context, chat):
+        calls.append(user_message_content)
+        await asyncio.sleep(0.05)
+        chat.set_api_result(content=f"reply to {user_message_content}")
+        return {}, chat
+    
+    monkeypatch.setattr(tasks, "call_coze_api", call_coze_api)
+    return calls
+
+
+def _send(session_id, message, metadata=None, idempotency_key=None):
+    return tasks.send_message_task(session_id, message, metadata, idempotency_key=idempotency_key)
+
+
+def test_concurrent_duplicates_with_same_key_are_coalesced(connect_client, fake_coze_api):
+    async def main():
+        await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        
+        first, second = await asyncio.gather(
+            _send(session_id, "hi", idempotency_key="k1"),
+            _send(session_id, "hi", idempotency_key="k1"),
+        )
+        assert len(fake_coze_api) == 1
+        assert first["data"]["chat_id"] == second["data"]["chat_id"]
+        assert tasks._inflight_messages == {}
+    
+    asyncio.run(main())
+
+
+def test_requests_are_not_coalesced_without_matching_key(connect_client, fake_coze_api):
+    async def main():
+        await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        
+        results = await asyncio.gather(
+            # 未携带幂等键：连续发送相同内容各自处理
+            _send(session_id, "ok"),
+            _send(session_id, "ok"),
+            # 幂等键相同但元数据（stream）不同
+            _send(session_id, "ok", {"stream": False}, idempotency_key="k1"),
+            _send(session_id, "ok", {"stream": True}, idempotency_key="k1"),
+            # 幂等键不同
+            _send(session_id, "ok", idempotency_key="k2"),
+        )
+        assert len(fake_coze_api) == 5
+        assert len({result["data"]["chat_id"] for result in results}) == 5
+    
+    asyncio.run(main())
+
+
+def test_completed_request_is_not_reused(connect_client, fake_coze_api):
+    """去重只针对进行中的请求，完成后相同的请求会创建新的聊天"""
+    
+    async def main():
+        await connect_client()
+        session_id = (await tasks.create_session_task("u1"))["data"]["session_id"]
+        
+        first = await _send(session_id, "hi", idempotency_key="k1")
+        second = await _send(session_id, "hi", idempotency_key="k1")
+        assert len(fake_coze_api) == 2
+        assert first["data"]["chat_id"] != second["data"]["chat_id"]
+        
+        session = (await tasks.get_session_task(session_id))["data"]
+        assert len(session["chat_history"]) == 2
+    
+    asyncio.run(main())
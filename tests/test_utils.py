@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+JSON工具测试：orjson无法序列化的数据回退到 default=str 或标准库json
+"""
+
+from decimal import Decimal
+
+from app.utils import safe_json_dumps, safe_json_dumps_bytes, safe_json_loads
+
+
+def test_dumps_handles_types_orjson_rejects():
+    data = {"big": 2 ** 70, "price": Decimal("1.5"), "text": "中文"}
+
+    dumped = safe_json_dumps(data)
+
+    assert safe_json_loads(dumped) == {"big": 2 ** 70, "price": "1.5", "text": "中文"}
+    assert safe_json_loads(safe_json_dumps_bytes(data)) == safe_json_loads(dumped)